@@ -1,19 +1,134 @@
-from fastapi import FastAPI, Response
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+from email.utils import formatdate, parsedate_to_datetime
+import asyncio
+import hmac
 import uvicorn
-from datetime import datetime, timedelta
+from datetime import timezone
 import os
+import time
 
 from torah_calendar import TorahCalendar
 from sefaria_client import SefariaClient
 from rss_generator import RSSGenerator
-from cache import FileCache
+from cache import TieredCache, TextStore, compress_variants, make_entry, make_etag, variant_etag
+from cache_backends import create_backend
+from singleflight import SingleFlight
+from corpus import Corpus
+from resilience import CircuitBreaker, Upstream
+from daily_division import DailyDivider
+from profiling import profile
+from render_pool import RenderPool
+from metrics import BUILD_SECONDS, CACHE_READ_SECONDS, CACHE_REQUESTS, REGISTRY, STAGE_SECONDS, Gauge, location_label
 
-app = FastAPI(title="Torah RSS Feed", description="Daily and Weekly Torah Portions")
-cache = FileCache()
-sefaria = SefariaClient()
-calendar = TorahCalendar()
-rss_gen = RSSGenerator()
+# Serve expired feeds immediately while a background task rebuilds them
+SERVE_STALE = os.environ.get("SERVE_STALE", "1") == "1"
+# Past this age a stale feed is too far out of date to serve
+STALE_MAX_AGE_HOURS = float(os.environ.get("STALE_MAX_AGE_HOURS", 72))
+# Stream cache misses to the client as items are rendered
+STREAM_FEEDS = os.environ.get("STREAM_FEEDS", "0") == "1"
+# Proactively rebuild feeds before they expire
+REFRESH_SCHEDULER = os.environ.get("REFRESH_SCHEDULER", "0") == "1"
+REFRESH_INTERVAL_MINUTES = float(os.environ.get("REFRESH_INTERVAL_MINUTES", 10))
+# Rebuild once a feed has used up this fraction of its TTL
+REFRESH_AHEAD_FRACTION = float(os.environ.get("REFRESH_AHEAD_FRACTION", 0.75))
+# Upstream connection pool and timeouts
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("HTTP_MAX_CONNECTIONS_PER_HOST", 8))
+HTTP_TOTAL_TIMEOUT = float(os.environ.get("HTTP_TOTAL_TIMEOUT", 30))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", 30))
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL", 300))
+# Retries for transient upstream errors, and when to stop calling a failing upstream
+UPSTREAM_RETRY_ATTEMPTS = int(os.environ.get("UPSTREAM_RETRY_ATTEMPTS", 3))
+UPSTREAM_BREAKER_THRESHOLD = int(os.environ.get("UPSTREAM_BREAKER_THRESHOLD", 5))
+UPSTREAM_BREAKER_RESET_SECONDS = float(os.environ.get("UPSTREAM_BREAKER_RESET_SECONDS", 30))
+
+# Where feeds are cached: file, sqlite, mmap, redis, or local (in-process stand-in for redis)
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "file")
+CACHE_DIR = os.environ.get("CACHE_DIR", "/tmp/torah_cache")
+# Coordinate rebuilds between workers through the backend's locks: lock files, or keys with a TTL
+CACHE_LOCKS = os.environ.get("CACHE_LOCKS", "0") == "1"
+# How long to wait for another worker's rebuild before doing it anyway
+CACHE_LOCK_TIMEOUT_SECONDS = float(os.environ.get("CACHE_LOCK_TIMEOUT_SECONDS", 60))
+# Render feed items inline, or in a thread or process pool so the event loop keeps serving
+RENDER_POOL = os.environ.get("RENDER_POOL", "thread")
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", 0)) or None
+# Profiling of feed rebuilds on request; disabled unless a token is set
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_TOP_N = int(os.environ.get("PROFILE_TOP_N", 30))
+PROFILE_DIR = os.environ.get("PROFILE_DIR")
+# Admin routes, e.g. invalidating stored texts; disabled unless a token is set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+FEED_MAX_AGE_HOURS = {"weekly": 6, "daily": 2}
+LOCATIONS = ("diaspora", "israel")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the pool on the serving loop so connections are reused from the first request
+    await sefaria.open()
+    scheduler = asyncio.create_task(refresh_scheduler()) if REFRESH_SCHEDULER else None
+    yield
+    tasks = list(background_tasks) + ([scheduler] if scheduler else [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # Background tasks only wrap a shielded rebuild, so stop the rebuilds
+    # themselves before closing the session they use
+    await regenerations.cancel_all()
+    # Close the connector so reloads don't leak sockets
+    await calendar.close()
+    await sefaria.close()
+    render_pool.close()
+
+def make_upstream(name: str, keep_last_good: bool = True) -> Upstream:
+    breaker = CircuitBreaker(UPSTREAM_BREAKER_THRESHOLD, UPSTREAM_BREAKER_RESET_SECONDS)
+    return Upstream(name, attempts=UPSTREAM_RETRY_ATTEMPTS, breaker=breaker, keep_last_good=keep_last_good)
+
+app = FastAPI(title="Torah RSS Feed", description="Daily and Weekly Torah Portions", lifespan=lifespan)
+cache = TieredCache(
+    create_backend(
+        CACHE_BACKEND,
+        cache_dir=CACHE_DIR,
+        redis_url=os.environ.get("REDIS_URL"),
+        mmap_slots=int(os.environ.get("CACHE_MMAP_SLOTS", 16)),
+        mmap_slot_bytes=int(os.environ.get("CACHE_MMAP_SLOT_MB", 4)) * 1024 * 1024
+    ),
+    max_bytes=int(os.environ.get("MEMORY_CACHE_MB", 64)) * 1024 * 1024
+)
+sefaria = SefariaClient(
+    text_store=TextStore(os.environ.get("TEXT_STORE_DIR", "/tmp/torah_cache/texts")),
+    # The text store already keeps every good response
+    upstream=make_upstream("Sefaria", keep_last_good=False),
+    corpus=Corpus(os.environ.get("CORPUS_PATH", "torah_corpus.bin")),
+    divider=DailyDivider(os.environ.get("ALIYOT_PATH", "aliyot.json")),
+    limit=HTTP_MAX_CONNECTIONS,
+    limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+    total_timeout=HTTP_TOTAL_TIMEOUT,
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+    dns_cache_ttl=HTTP_DNS_CACHE_TTL
+)
+calendar = TorahCalendar(session_getter=sefaria.get_session, upstream=make_upstream("Hebcal"))
+render_pool = RenderPool(RENDER_POOL, RENDER_WORKERS)
+rss_gen = RSSGenerator(
+    max_concurrency=int(os.environ.get("SEFARIA_MAX_CONCURRENCY", 4)),
+    pretty=os.environ.get("PRETTY_XML", "1") == "1",
+    item_cache_size=int(os.environ.get("ITEM_CACHE_SIZE", 256)),
+    pool=render_pool
+)
+regenerations = SingleFlight()
+background_tasks = set()
+
+REGISTRY.register(Gauge("torah_memory_cache_bytes", "Bytes held by this worker's in-memory feed cache",
+                        lambda: cache.stats()['bytes']))
+REGISTRY.register(Gauge("torah_memory_cache_entries", "Feeds held by this worker's in-memory feed cache",
+                        lambda: cache.stats()['entries']))
+REGISTRY.register(Gauge("torah_item_cache_entries", "Rendered feed items kept for reuse by later rebuilds",
+                        lambda: rss_gen.items.stats()['entries']))
 
 @app.get("/")
 async def root():
@@ -31,47 +146,367 @@ async def root():
     </body></html>
     """)
 
-@app.get("/feeds/weekly")
-@app.get("/feeds/weekly/{location}")
-async def weekly_feed(location: str = "diaspora"):
-    cache_key = f"weekly_{location}"
+async def wait_for_other_worker(cache_key: str, lock) -> Optional[Dict[str, Any]]:
+    """Take the key's cross-process lock.
+    
+    If another worker holds it, wait until it's done and return the entry
+    that worker wrote, if any. Returns None once this worker should rebuild.
+    """
+    if lock.acquire():
+        return None
     
-    # Check cache (refresh every 6 hours)
-    cached = cache.get(cache_key, max_age_hours=6)
-    if cached:
-        return Response(content=cached, media_type="application/rss+xml")
+    previous = cache.get_entry(cache_key)
+    deadline = time.monotonic() + CACHE_LOCK_TIMEOUT_SECONDS
+    while not lock.acquire():
+        if time.monotonic() > deadline:
+            print(f"Timed out waiting for another worker to rebuild {cache_key}")
+            return None
+        await asyncio.sleep(0.05)
     
-    # Get upcoming Torah portions (next 8 weeks)
-    upcoming_parashot = calendar.get_upcoming_parashot(location, count=8)
+    entry = cache.reload_entry(cache_key)
+    if entry and (previous is None or entry['timestamp'] > previous['timestamp']):
+        lock.release()
+        return entry
+    return None
+
+async def build_feed(kind: str, location: str, on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Regenerate and cache a feed, handing each chunk to on_chunk as it's produced.
     
-    # Generate RSS with upcoming portions
-    rss_content = await rss_gen.generate_upcoming_weekly_feed(upcoming_parashot, location, sefaria)
+    Returns the new cache entry.
+    """
+    if not CACHE_LOCKS:
+        return await render_feed(kind, location, on_chunk)
     
-    # Cache result
-    cache.set(cache_key, rss_content)
+    cache_key = f"{kind}_{location}"
+    lock = cache.lock(cache_key)
+    entry = await wait_for_other_worker(cache_key, lock)
+    if entry:
+        if on_chunk:
+            on_chunk(entry['content'])
+        return entry
     
-    return Response(content=rss_content, media_type="application/rss+xml")
+    try:
+        return await render_feed(kind, location, on_chunk)
+    finally:
+        lock.release()
 
-@app.get("/feeds/daily")
-@app.get("/feeds/daily/{location}")
-async def daily_feed(location: str = "diaspora"):
-    cache_key = f"daily_{location}"
+def read_entry(cache_key: str, labels: Dict[str, str], reload: bool = False) -> Optional[Dict[str, Any]]:
+    """cache.get_entry, or reload_entry, timed by the tier that answered"""
+    tier = "memory" if not reload and cache.in_memory(cache_key) else "backend"
+    started = time.perf_counter()
+    entry = cache.reload_entry(cache_key) if reload else cache.get_entry(cache_key)
+    CACHE_READ_SECONDS.observe(time.perf_counter() - started, tier=tier, **labels)
+    return entry
+
+async def render_feed(kind: str, location: str, on_chunk: Optional[Callable[[str], None]] = None,
+                      generator: Optional[RSSGenerator] = None, pool: Optional[RenderPool] = None) -> Dict[str, Any]:
+    """Rebuild and cache a feed with generator and pool, by default the app's own"""
+    generator = generator or rss_gen
+    pool = pool or render_pool
+    cache_key = f"{kind}_{location}"
+    labels = {"kind": kind, "location": location_label(location)}
+    build_started = time.perf_counter()
+    
+    started = time.perf_counter()
+    failed = []
+    if kind == "weekly":
+        # Get upcoming Torah portions (next 8 weeks)
+        upcoming_parashot = await calendar.get_upcoming_parashot_async(location, count=8)
+        stream = generator.stream_upcoming_weekly_feed(upcoming_parashot, location, sefaria, failed)
+    else:
+        # Get upcoming Torah portions for daily division
+        upcoming_parashot = await calendar.get_upcoming_parashot_async(location, count=4)  # Next 4 weeks
+        stream = generator.stream_upcoming_daily_feed(upcoming_parashot, location, sefaria, failed)
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage="calendar", **labels)
+    
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+        if on_chunk:
+            on_chunk(chunk)
+    rss_content = "".join(chunks)
+    # The ETag covers the items, not the channel header, whose lastBuildDate
+    # changes on every rebuild
+    etag = make_etag("".join(chunks[1:]))
+    
+    # A feed missing portions never replaces a cached one, which keeps
+    # being served (stale if need be) until a rebuild is complete again
+    entry = cache.get_entry(cache_key) if failed else None
+    # Read from the backend, so workers converge on one copy of an unchanged feed
+    previous = None if failed else cache.reload_entry(cache_key)
+    if entry:
+        print(f"Keeping the cached {cache_key}; couldn't build {', '.join(failed)}")
+    elif previous and previous['etag'] == etag:
+        # Same items: keep the previous document, with its lastBuildDate and
+        # Last-Modified, so conditional requests still match; only its age resets
+        started = time.perf_counter()
+        entry = cache.set(cache_key, previous['content'], previous['encodings'], etag, previous['modified'])
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="cache", **labels)
+    else:
+        # Compression runs in the render pool too; it's timed apart from the backend write
+        started = time.perf_counter()
+        encodings = await pool.run(compress_variants, rss_content)
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="compress", **labels)
+        if failed:
+            # Nothing to fall back on: serve it this once and rebuild next time
+            print(f"Not caching {cache_key}; couldn't build {', '.join(failed)}")
+            entry = make_entry(rss_content, encodings, etag)
+        else:
+            started = time.perf_counter()
+            entry = cache.set(cache_key, rss_content, encodings, etag)
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="cache", **labels)
+    BUILD_SECONDS.observe(time.perf_counter() - build_started, **labels)
+    return entry
+
+def run_in_background(coro: Awaitable[Any], description: str) -> None:
+    """Run coro without awaiting it, logging rather than raising its errors"""
+    async def run():
+        try:
+            await coro
+        except Exception as e:
+            print(f"{description} failed: {e}")
+    
+    # Keep a reference so the task isn't garbage collected mid-run
+    task = asyncio.create_task(run())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+def refresh_in_background(kind: str, location: str) -> None:
+    """Start a rebuild of the feed unless one is already running"""
+    cache_key = f"{kind}_{location}"
+    if regenerations.in_flight(cache_key):
+        return
+    
+    rebuild = regenerations.start(cache_key, lambda: build_feed(kind, location))
+    run_in_background(asyncio.shield(rebuild), f"Background refresh of {cache_key}")
+
+async def stream_feed(request: Request, kind: str, location: str) -> Response:
+    """Regenerate a feed, sending each chunk to the client as soon as it's rendered.
+    
+    The rebuild runs as the single-flight task for the key, so it finishes
+    and is cached even if this client disconnects, and concurrent requests
+    wait for its result as usual. Nothing is sent until the first chunk is
+    ready, so a rebuild that fails before then still gets rebuild_failed's
+    response rather than an empty 200.
+    """
+    cache_key = f"{kind}_{location}"
+    chunks: asyncio.Queue = asyncio.Queue()
+    
+    async def produce():
+        try:
+            return await build_feed(kind, location, on_chunk=chunks.put_nowait)
+        finally:
+            chunks.put_nowait(None)
+    
+    # Register the rebuild before returning, so requests that arrive before
+    # it first runs wait for its entry instead of streaming from a queue
+    # nothing will ever fill
+    rebuild = regenerations.start(cache_key, produce)
+    run_in_background(asyncio.shield(rebuild), f"Streaming rebuild of {cache_key}")
+    
+    first = await chunks.get()
+    if first is None:
+        # Finished, or more likely failed, without producing anything
+        try:
+            entry = await asyncio.shield(rebuild)
+        except Exception as e:
+            return rebuild_failed(request, cache_key, e)
+        return feed_response(request, entry)
+    
+    async def body():
+        chunk = first
+        while chunk is not None:
+            yield chunk
+            chunk = await chunks.get()
+    
+    return StreamingResponse(body(), media_type="application/rss+xml")
+
+def rebuild_failed(request: Request, cache_key: str, error: Exception) -> Response:
+    """Answer a request whose feed couldn't be rebuilt: with the cached copy, however old, or a 503"""
+    entry = cache.get_entry(cache_key)
+    if entry:
+        print(f"Rebuilding {cache_key} failed ({error}); serving the copy cached "
+              f"{formatdate(entry['timestamp'], usegmt=True)}")
+        return feed_response(request, entry)
+    print(f"Rebuilding {cache_key} failed: {error}")
+    return Response(status_code=503, headers={"Retry-After": "60"})
+
+def is_not_modified(request: Request, etag: str, timestamp: float) -> bool:
+    """Check the request's validators against a representation's ETag and modification time"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence and uses weak comparison
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Last-Modified only has one-second resolution
+        return int(timestamp) <= since.timestamp()
+    
+    return False
+
+def choose_encoding(request: Request, available) -> Optional[str]:
+    """Pick the best stored encoding the client accepts, or None for identity"""
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    
+    # Brotli is smaller, so prefer it when both are acceptable
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+def feed_response(request: Request, entry: Dict[str, Any]) -> Response:
+    encodings = entry.get('encodings', {})
+    encoding = choose_encoding(request, encodings)
     
-    # Check cache (refresh every 2 hours)
-    cached = cache.get(cache_key, max_age_hours=2)
-    if cached:
-        return Response(content=cached, media_type="application/rss+xml")
+    etag = variant_etag(entry['etag'], encoding)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(entry['modified'], usegmt=True),
+        "Vary": "Accept-Encoding"
+    }
+    if is_not_modified(request, etag, entry['modified']):
+        return Response(status_code=304, headers=headers)
+    
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(content=encodings[encoding], media_type="application/rss+xml", headers=headers)
+    return Response(content=entry['content'], media_type="application/rss+xml", headers=headers)
+
+def has_token(request: Request, header: str, expected: str) -> bool:
+    """Whether header carries the expected token; always False while expected is empty"""
+    if not expected:
+        return False
+    token = request.headers.get(header, "")
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+def profile_requested(request: Request) -> bool:
+    """Whether the request carries the profiling token; always False unless PROFILE_TOKEN is set.
+    
+    Only the header is accepted, so the token never ends up in URLs and access logs.
+    """
+    return has_token(request, "x-profile-token", PROFILE_TOKEN)
+
+async def profile_feed(request: Request, kind: str, location: str) -> Response:
+    """Rebuild the feed under the profilers and return the report instead of the feed.
+    
+    cold=1 first empties the item and verse caches so every item is rendered.
+    cProfile only sees the thread that enables it, so the rebuild renders and
+    compresses inline on the event loop whatever RENDER_POOL is.
+    """
+    if request.query_params.get("cold") == "1":
+        rss_gen.clear_caches()
+    inline = RenderPool("none")
+    report = await profile(lambda: render_feed(kind, location, generator=rss_gen.with_pool(inline), pool=inline),
+                           f"{kind}/{location}", top_n=PROFILE_TOP_N, store_dir=PROFILE_DIR)
+    return PlainTextResponse(report, headers={"Cache-Control": "no-store"})
+
+async def serve_feed(request: Request, kind: str, location: str) -> Response:
+    if profile_requested(request):
+        return await profile_feed(request, kind, location)
     
-    # Get upcoming Torah portions for daily division
-    upcoming_parashot = calendar.get_upcoming_parashot(location, count=4)  # Next 4 weeks
+    cache_key = f"{kind}_{location}"
+    max_age_hours = FEED_MAX_AGE_HOURS[kind]
+    labels = {"kind": kind, "location": location_label(location)}
     
-    # Generate RSS with daily portions from upcoming parashot
-    rss_content = await rss_gen.generate_upcoming_daily_feed(upcoming_parashot, location, sefaria)
+    entry = read_entry(cache_key, labels)
+    if entry and time.time() - entry['timestamp'] > max_age_hours * 3600 and not regenerations.in_flight(cache_key):
+        # Another worker may already have rebuilt it in the shared backend.
+        # While this worker's own rebuild runs, the stale copy is served as
+        # is, so a failing upstream costs one reload per rebuild, not per request
+        entry = read_entry(cache_key, labels, reload=True) or entry
+    if entry:
+        age_hours = (time.time() - entry['timestamp']) / 3600
+        if age_hours <= max_age_hours:
+            CACHE_REQUESTS.inc(result="hit", **labels)
+            return feed_response(request, entry)
+        if SERVE_STALE and age_hours <= STALE_MAX_AGE_HOURS:
+            CACHE_REQUESTS.inc(result="stale", **labels)
+            refresh_in_background(kind, location)
+            return feed_response(request, entry)
     
-    # Cache result
-    cache.set(cache_key, rss_content)
+    coalesced = regenerations.in_flight(cache_key)
+    CACHE_REQUESTS.inc(result="coalesced" if coalesced else "miss", **labels)
     
-    return Response(content=rss_content, media_type="application/rss+xml")
+    # Stream a fresh build unless one is already running for this key
+    if STREAM_FEEDS and not coalesced:
+        return await stream_feed(request, kind, location)
+    
+    # Only one regeneration per key; concurrent requests share its result
+    try:
+        entry = await regenerations.do(cache_key, lambda: build_feed(kind, location))
+    except Exception as e:
+        return rebuild_failed(request, cache_key, e)
+    
+    return feed_response(request, entry)
+
+async def refresh_scheduler():
+    """Rebuild every feed variant shortly before it expires.
+    
+    The default /feeds/weekly and /feeds/daily routes share the diaspora
+    cache entries, so refreshing both locations covers all six routes.
+    """
+    while True:
+        for kind, max_age_hours in FEED_MAX_AGE_HOURS.items():
+            for location in LOCATIONS:
+                cache_key = f"{kind}_{location}"
+                _, age_hours = cache.get_with_age(cache_key)
+                if age_hours < max_age_hours * REFRESH_AHEAD_FRACTION:
+                    continue
+                try:
+                    await regenerations.do(cache_key, lambda: build_feed(kind, location))
+                    print(f"Scheduled refresh of {cache_key} complete")
+                except Exception as e:
+                    print(f"Scheduled refresh of {cache_key} failed: {e}")
+        
+        await asyncio.sleep(REFRESH_INTERVAL_MINUTES * 60)
+
+@app.get("/metrics")
+async def metrics():
+    # Per worker process; with several workers each scrape reaches whichever
+    # one accepts it, so the numbers are only coherent with a single worker
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/admin/texts/invalidate")
+async def invalidate_texts(request: Request, ref: Optional[str] = None):
+    """Drop stored texts overlapping ref, or all of them, and everything rendered from them.
+    
+    Other workers sharing the text store notice at their next rebuild. Cached
+    feeds are left alone and pick up the corrected text when they're rebuilt.
+    """
+    if not has_token(request, "x-admin-token", ADMIN_TOKEN):
+        return Response(status_code=404)
+    removed = sefaria.invalidate_texts(ref)
+    rss_gen.clear_caches()
+    return {"removed": removed}
+
+@app.get("/feeds/weekly")
+@app.get("/feeds/weekly/{location}")
+async def weekly_feed(request: Request, location: str = "diaspora"):
+    # Refresh every 6 hours
+    return await serve_feed(request, "weekly", location)
+
+@app.get("/feeds/daily")
+@app.get("/feeds/daily/{location}")
+async def daily_feed(request: Request, location: str = "diaspora"):
+    # Refresh every 2 hours
+    return await serve_feed(request, "daily", location)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import json
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cache import TieredCache, compress_variants
+from cache_backends import BACKENDS, create_backend
+from daily_division import DailyDivider
+from parashot import TORAH_PORTION_MAP, parse_ref
+from rss_generator import RSSGenerator
+from sefaria_client import SefariaClient
+from torah_calendar import TorahCalendar
+
+# Upcoming parashot per feed, as app.build_feed requests them
+FEED_COUNTS = {"weekly": 8, "daily": 4}
+LOCATIONS = ("diaspora", "israel")
+
+class FixtureResponse:
+    """Just enough of aiohttp's ClientResponse for the clients"""
+    
+    def __init__(self, status: int, data: Any, latency: float):
+        self.status = status
+        self.data = data
+        self.latency = latency
+    
+    async def __aenter__(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def json(self, content_type: Optional[str] = None) -> Any:
+        return self.data
+    
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise RuntimeError(f"Fixture response {self.status}")
+
+class FixtureSession:
+    """Stands in for the aiohttp session, answering /texts requests from fixtures.
+    
+    latency delays every response to mimic the round trip to Sefaria.
+    """
+    
+    def __init__(self, responses: Dict[str, Any], latency: float = 0.0):
+        self.responses = responses
+        self.latency = latency
+        self.closed = False
+        self.requests = 0
+    
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> FixtureResponse:
+        self.requests += 1
+        ref = url.rsplit('/texts/', 1)[-1]
+        data = self.responses.get(ref) or self._chapters_response(ref)
+        return FixtureResponse(200 if data is not None else 404, data, self.latency)
+    
+    def _chapters_response(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Response for a whole-chapter ref like "Genesis.6-25", assembled from the portion fixtures.
+        
+        These are the requests the fetch planner makes.
+        """
+        match = re.match(r'^(?P<book>[A-Za-z ]+)\.(?P<start>\d+)(?:-(?P<end>\d+))?$', ref)
+        if not match:
+            return None
+        book, start = match['book'], int(match['start'])
+        end = int(match['end'] or start)
+        
+        chapters = {}
+        sample = None
+        for fixture_ref, data in self.responses.items():
+            try:
+                fixture_book, start_chapter, _, _, _ = parse_ref(fixture_ref)
+            except ValueError:
+                continue
+            if fixture_book != book:
+                continue
+            sample = data
+            text = data.get('text', [])
+            if text and not isinstance(text[0], list):
+                text = [text]
+            for offset, verses in enumerate(text):
+                chapters.setdefault(start_chapter + offset, verses)
+        
+        if sample is None or any(chapter not in chapters for chapter in range(start, end + 1)):
+            return None
+        return {
+            'text': [chapters[chapter] for chapter in range(start, end + 1)],
+            'he': [],
+            'versionTitle': sample.get('versionTitle', ''),
+            'versionSource': sample.get('versionSource', '')
+        }
+    
+    async def close(self) -> None:
+        self.closed = True
+
+
+def synthetic_fixtures(words_per_verse: int = 25) -> Dict[str, Any]:
+    """Deterministic /texts responses for every mapped parasha, for running without recordings.
+    
+    Every chapter gets 40 verses (more if a ref needs them) of filler text
+    about as long as a JPS verse.
+    """
+    responses = {}
+    for ref in TORAH_PORTION_MAP.values():
+        book, start_chapter, start_verse, end_chapter, end_verse = parse_ref(ref)
+        verses = max(40, start_verse, end_verse)
+        text = [[f"{book} {chapter}:{verse} " + " ".join(["word"] * words_per_verse)
+                 for verse in range(1, verses + 1)]
+                for chapter in range(start_chapter, end_chapter + 1)]
+        responses[ref] = {
+            'text': text if len(text) > 1 else text[0],
+            'he': [],
+            'versionTitle': 'Synthetic fixture',
+            'versionSource': ''
+        }
+    return responses
+
+async def record_fixtures(output_path: str, aliyot_path: Optional[str] = None) -> None:
+    """Fetch every parasha (and aliyah, if the table exists) from Sefaria and save the responses"""
+    client = SefariaClient()
+    refs = list(dict.fromkeys(TORAH_PORTION_MAP.values()))
+    divider = DailyDivider(aliyot_path)
+    refs += [ref for name in TORAH_PORTION_MAP for ref in divider.aliyah_refs(name) or []]
+    
+    responses = {}
+    try:
+        for ref in refs:
+            data = await client.fetch_text(ref)
+            if data is not None:
+                responses[ref] = data
+            print(f"Recorded {ref}")
+    finally:
+        await client.close()
+    
+    with open(output_path, 'w') as f:
+        json.dump({'sefaria': responses}, f)
+    print(f"Wrote {len(responses)} responses to {output_path}")
+
+
+def cpu_ms(func: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.process_time()
+    result = func()
+    return result, (time.process_time() - start) * 1000
+
+async def async_cpu_ms(func: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+    start = time.process_time()
+    result = await func()
+    return result, (time.process_time() - start) * 1000
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        'min': round(ordered[0], 3),
+        'median': round(statistics.median(ordered), 3),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+def ops_per_second(func: Callable[[], Any], seconds: float = 0.2) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        func()
+        count += 1
+    return round(count / (time.perf_counter() - start), 1)
+
+
+class Bench:
+    """Builds every feed variant against fixtures the way the app does"""
+    
+    def __init__(self, responses: Dict[str, Any], backend: str, latency: float,
+                 aliyot_path: Optional[str], max_concurrency: int):
+        self.responses = responses
+        self.backend = backend
+        self.latency = latency
+        self.aliyot_path = aliyot_path
+        self.max_concurrency = max_concurrency
+        # Scratch directory of the variant being benchmarked; caches go under it
+        self.scratch: Optional[str] = None
+    
+    def client(self, latency: Optional[float] = None) -> SefariaClient:
+        client = SefariaClient(divider=DailyDivider(self.aliyot_path))
+        client.session = FixtureSession(self.responses, self.latency if latency is None else latency)
+        return client
+    
+    def cache(self) -> TieredCache:
+        return TieredCache(create_backend(self.backend, cache_dir=tempfile.mkdtemp(prefix="cache_", dir=self.scratch)))
+    
+    async def build(self, kind: str, location: str, calendar: TorahCalendar, generator: RSSGenerator,
+                    client: SefariaClient, cache: TieredCache) -> Dict[str, Any]:
+        upcoming = await calendar.get_upcoming_parashot_async(location, count=FEED_COUNTS[kind])
+        if kind == "weekly":
+            stream = generator.stream_upcoming_weekly_feed(upcoming, location, client)
+        else:
+            stream = generator.stream_upcoming_daily_feed(upcoming, location, client)
+        content = "".join([chunk async for chunk in stream])
+        return cache.set(f"{kind}_{location}", content)
+    
+    async def cold(self, kind: str, location: str) -> Tuple[float, Dict[str, Any], int]:
+        """Latency, entry and upstream request count of a full rebuild with every cache in the process empty"""
+        calendar, generator = TorahCalendar(), RSSGenerator(self.max_concurrency)
+        client, cache = self.client(), self.cache()
+        start = time.perf_counter()
+        entry = await self.build(kind, location, calendar, generator, client, cache)
+        return (time.perf_counter() - start) * 1000, entry, client.session.requests
+    
+    async def stages(self, kind: str, location: str) -> Dict[str, float]:
+        """CPU time of each stage of one cold rebuild, run one after another"""
+        calendar, generator, client = TorahCalendar(), RSSGenerator(self.max_concurrency), self.client(latency=0)
+        cpu = {}
+        
+        upcoming, cpu['calendar'] = cpu_ms(lambda: calendar.get_upcoming_parashot(location, FEED_COUNTS[kind]))
+        
+        texts, cpu['fetch'] = await async_cpu_ms(lambda: generator.fetch_upcoming(client, upcoming, kind == "daily"))
+        
+        def render():
+            fields = []
+            if kind == "weekly":
+                for parasha, torah_text in zip(upcoming, texts):
+                    if torah_text:
+                        fields.append(generator._upcoming_weekly_item(parasha, torah_text))
+            else:
+                two_days_ago = datetime.now().date() - timedelta(days=2)
+                for parasha, portions in zip(upcoming, texts):
+                    fields.extend(item for _, item in generator._upcoming_daily_items(parasha, portions or [], two_days_ago))
+            return fields
+        fields, cpu['render'] = cpu_ms(render)
+        
+        channel = generator._channel("Benchmark", "Benchmark", generator.base_url)
+        content, cpu['serialize'] = cpu_ms(lambda: "".join(generator.writer.write(channel, fields)))
+        
+        encodings, cpu['compress'] = cpu_ms(lambda: compress_variants(content))
+        cache = self.cache()
+        _, cpu['cache'] = cpu_ms(lambda: cache.set(f"{kind}_{location}", content, encodings))
+        return {stage: round(ms, 3) for stage, ms in cpu.items()}
+    
+    async def variant(self, kind: str, location: str, runs: int) -> Dict[str, Any]:
+        """Benchmark one feed variant, removing the caches it wrote afterwards"""
+        with tempfile.TemporaryDirectory(prefix="torah_bench_") as scratch:
+            self.scratch = scratch
+            try:
+                return await self._variant(kind, location, runs)
+            finally:
+                self.scratch = None
+    
+    async def _variant(self, kind: str, location: str, runs: int) -> Dict[str, Any]:
+        cold_ms = []
+        entry = None
+        for _ in range(runs):
+            ms, entry, requests = await self.cold(kind, location)
+            cold_ms.append(ms)
+        
+        # Rebuilds in a warm process reuse cached items and verse fragments
+        calendar, generator, client, cache = TorahCalendar(), RSSGenerator(self.max_concurrency), self.client(), self.cache()
+        await self.build(kind, location, calendar, generator, client, cache)
+        warm_ms = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            await self.build(kind, location, calendar, generator, client, cache)
+            warm_ms.append((time.perf_counter() - start) * 1000)
+        
+        # Separate run, since tracing allocations slows everything down
+        tracemalloc.start()
+        await self.cold(kind, location)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        key = f"{kind}_{location}"
+        backend = cache.backend
+        return {
+            'parashot': [p['name_english'] for p in calendar.get_upcoming_parashot(location, FEED_COUNTS[kind])],
+            'feed_bytes': len(entry['content'].encode('utf-8')),
+            'upstream_requests': requests,
+            'cold_ms': summarize(cold_ms),
+            'warm_rebuild_ms': summarize(warm_ms),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'stage_cpu_ms': await self.stages(kind, location),
+            'cache_hit_ops_per_sec': {
+                'memory': ops_per_second(lambda: cache.get_entry(key)),
+                'backend': ops_per_second(lambda: backend.get_entry(key)),
+            },
+        }
+
+
+async def run(args) -> Dict[str, Any]:
+    if args.fixtures:
+        with open(args.fixtures, 'r') as f:
+            responses = json.load(f)['sefaria']
+    else:
+        responses = synthetic_fixtures()
+    
+    bench = Bench(responses, args.backend, args.latency_ms / 1000, args.aliyot, args.max_concurrency)
+    variants = {}
+    for kind in FEED_COUNTS:
+        for location in LOCATIONS:
+            variants[f"{kind}_{location}"] = await bench.variant(kind, location, args.runs)
+            print(f"Benchmarked {kind}_{location}", file=sys.stderr)
+    
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'fixtures': args.fixtures or 'synthetic',
+        'backend': args.backend,
+        'latency_ms': args.latency_ms,
+        'runs': args.runs,
+        'variants': variants,
+    }
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{name}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{name}"] = value
+    return flat
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> bool:
+    """Print each metric's change from baseline; True if any got worse by more than threshold"""
+    regressed = False
+    for variant, metrics in current['variants'].items():
+        before = baseline['variants'].get(variant)
+        if before is None:
+            continue
+        if before.get('parashot') != metrics.get('parashot'):
+            print(f"{variant}: different parashot than the baseline, results aren't directly comparable")
+        old, new = flatten(before), flatten(metrics)
+        for name in sorted(set(old) & set(new)):
+            if not old[name]:
+                continue
+            change = (new[name] - old[name]) / old[name]
+            # Throughput is better when higher, everything else when lower
+            worse = -change if name.startswith('cache_hit_ops_per_sec') else change
+            flag = "  REGRESSION" if worse > threshold and name != 'feed_bytes' else ""
+            regressed = regressed or bool(flag)
+            print(f"{variant} {name}: {old[name]} -> {new[name]} ({change:+.1%}){flag}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark feed generation against recorded or synthetic Sefaria responses")
+    parser.add_argument("--fixtures", help="Recorded responses from --record; synthetic text is used without them")
+    parser.add_argument("--record", metavar="PATH", help="Record Sefaria responses to PATH and exit")
+    parser.add_argument("--aliyot", help="Aliyot table, so daily feeds are divided as in production")
+    parser.add_argument("--backend", default="file", choices=BACKENDS, help="Cache backend to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions per latency measurement")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated upstream round trip")
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--output", help="Write results JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="Print changes against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown --compare reports as a regression")
+    args = parser.parse_args()
+    
+    if args.record:
+        asyncio.run(record_fixtures(args.record, args.aliyot))
+        sys.exit(0)
+    
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        sys.exit(1 if compare(baseline, results, args.threshold) else 0)
@@ -1,55 +1,540 @@
+import argparse
 import os
+import sys
 import json
+import gzip
+import hashlib
+import struct
+import tempfile
 import time
-from typing import Optional, Any
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Iterable, List, Tuple, Union
 from pathlib import Path
 
-class FileCache:
+from parashot import refs_overlap
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Feed cache file layout: MAGIC, little-endian uint32 index length, JSON index, sections
+ENTRY_MAGIC = b"TORFEED1"
+ENTRY_HEADER = struct.Struct("<8sI")
+# Quality 11 is hundreds of times slower on a full feed for a few percent
+# smaller output; 5 keeps compressing a rebuild down to a millisecond or two
+BROTLI_QUALITY = 5
+
+def compress_variants(content: str) -> Dict[str, bytes]:
+    """Precompress content once for every encoding available here"""
+    raw = content.encode('utf-8')
+    # mtime=0 keeps the gzip bytes deterministic
+    variants = {'gzip': gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(raw, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+    return variants
+
+def make_etag(content: str) -> str:
+    """Strong ETag derived from the content bytes"""
+    return '"' + hashlib.sha256(content.encode('utf-8')).hexdigest()[:32] + '"'
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag for one encoding of a representation; each needs its own strong ETag"""
+    return etag if not encoding else f"{etag[:-1]}-{encoding}\""
+
+def make_entry(content: str, encodings: Optional[Dict[str, bytes]] = None, etag: Optional[str] = None,
+               modified: Optional[float] = None) -> Dict[str, Any]:
+    """Cache entry for content, stamped now; encodings and the ETag are made unless given.
+    
+    timestamp is when the entry was written, for its age; modified is when
+    its content last changed, for Last-Modified, and defaults to now.
+    """
+    timestamp = time.time()
+    return {
+        'content': content,
+        'timestamp': timestamp,
+        'modified': modified if modified is not None else timestamp,
+        'etag': etag or make_etag(content),
+        'encodings': encodings if encodings is not None else compress_variants(content)
+    }
+
+def atomic_write(path: Path, data: Union[bytes, Iterable[bytes]]) -> None:
+    """Write data, or its pieces in order, to path so readers never see a partial file.
+    
+    It goes to a temporary name unique to this writer in the same directory
+    and is renamed over path in one step.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(data, (bytes, bytearray)):
+                f.write(data)
+            else:
+                f.writelines(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+def safe_key(key: str) -> str:
+    """Key reduced to characters that are safe in file names"""
+    return "".join(c for c in key if c.isalnum() or c in "_-")
+
+def encode_entry(data: Dict[str, Any]) -> List[bytes]:
+    """Serialize an entry as ENTRY_HEADER, a JSON index and its raw sections.
+    
+    The index holds the timestamps, the ETag and the length of every section:
+    the UTF-8 content followed by its precompressed variants. Returned as a
+    list of pieces so large bodies can be written without concatenating.
+    """
+    sections = [('identity', data['content'].encode('utf-8'))] + list(data['encodings'].items())
+    index = json.dumps({
+        'timestamp': data['timestamp'],
+        'modified': data['modified'],
+        'etag': data['etag'],
+        'sections': [[name, len(body)] for name, body in sections]
+    }).encode('utf-8')
+    return [ENTRY_HEADER.pack(ENTRY_MAGIC, len(index)), index] + [body for _, body in sections]
+
+def decode_entry(blob: bytes) -> Dict[str, Any]:
+    """Inverse of encode_entry; raises ValueError for anything malformed"""
+    try:
+        magic, index_length = ENTRY_HEADER.unpack_from(blob, 0)
+    except struct.error as e:
+        raise ValueError(f"truncated entry: {e}")
+    if magic != ENTRY_MAGIC:
+        raise ValueError("not a feed cache entry")
+    index = json.loads(bytes(blob[ENTRY_HEADER.size:ENTRY_HEADER.size + index_length]))
+    
+    sections = {}
+    offset = ENTRY_HEADER.size + index_length
+    for name, length in index['sections']:
+        sections[name] = bytes(blob[offset:offset + length])
+        offset += length
+    if offset != len(blob):
+        raise ValueError("entry length doesn't match its index")
+    
+    return {
+        'content': sections.pop('identity').decode('utf-8'),
+        'timestamp': index['timestamp'],
+        # Entries written before modified was recorded
+        'modified': index.get('modified', index['timestamp']),
+        'etag': index['etag'],
+        'encodings': sections
+    }
+
+class FileLock:
+    """Cross-process advisory lock backed by flock on a lock file.
+    
+    acquire() never blocks, so it's safe to poll from the event loop.
+    Where fcntl isn't available every acquire succeeds.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+    
+    def acquire(self) -> bool:
+        if fcntl is None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+    
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+class CacheBackend(ABC):
+    """Shared storage for feed cache entries.
+    
+    An entry is a dict of content, timestamp, etag and encodings (Content-Encoding
+    name -> precompressed body). Backends implement get_entry, _write, delete
+    and lock; expiry and compression are handled here.
+    """
+    
+    @abstractmethod
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the cache entry (content, timestamp, etag, encodings) without expiring it"""
+        ...
+    
+    @abstractmethod
+    def _write(self, key: str, data: Dict[str, Any]) -> None:
+        ...
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+    
+    @abstractmethod
+    def lock(self, key: str):
+        """Advisory lock other workers can see, e.g. to let one of them rebuild key.
+        
+        The lock has non-blocking acquire() -> bool and release() methods.
+        """
+        ...
+    
+    def get(self, key: str, max_age_hours: int = 24) -> Optional[str]:
+        """Get cached value if it exists and isn't expired"""
+        data = self.get_entry(key)
+        if data is None:
+            return None
+        
+        # Check if expired
+        age_hours = (time.time() - data['timestamp']) / 3600
+        if age_hours > max_age_hours:
+            self.delete(key)
+            return None
+        
+        return data['content']
+    
+    def get_with_age(self, key: str) -> Tuple[Optional[str], float]:
+        """Get cached value and its age in hours without expiring it.
+        
+        Used to serve stale content while a fresh copy is rebuilt.
+        """
+        data = self.get_entry(key)
+        if data is None:
+            return None, float('inf')
+        
+        return data['content'], (time.time() - data['timestamp']) / 3600
+    
+    def set(self, key: str, content: str, encodings: Optional[Dict[str, bytes]] = None,
+            etag: Optional[str] = None, modified: Optional[float] = None) -> Dict[str, Any]:
+        """Store content and its precompressed variants, and return the stored entry.
+        
+        encodings, when given, are variants already made by compress_variants;
+        etag and modified are passed on to make_entry.
+        """
+        data = make_entry(content, encodings, etag, modified)
+        
+        try:
+            self._write(key, data)
+        except Exception as e:
+            print(f"Cache write error: {e}")
+        
+        return data
+
+class FileCache(CacheBackend):
+    """Feed cache with one encode_entry file per key.
+    
+    Files are written with atomic_write, so readers in other workers never
+    see a partial entry.
+    """
+    
     def __init__(self, cache_dir: str = "/tmp/torah_cache"):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
     
     def _get_cache_path(self, key: str) -> Path:
-        # Simple key sanitization
-        safe_key = "".join(c for c in key if c.isalnum() or c in "_-")
-        return self.cache_dir / f"{safe_key}.json"
+        return self.cache_dir / f"{safe_key(key)}.feed"
     
-    def get(self, key: str, max_age_hours: int = 24) -> Optional[str]:
-        """Get cached value if it exists and isn't expired"""
+    def lock(self, key: str) -> FileLock:
+        return FileLock(self.cache_dir / f"{safe_key(key)}.lock")
+    
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
         cache_path = self._get_cache_path(key)
         
-        if not cache_path.exists():
+        try:
+            blob = cache_path.read_bytes()
+        except FileNotFoundError:
             return None
         
         try:
-            with open(cache_path, 'r') as f:
-                data = json.load(f)
-            
-            # Check if expired
-            age_hours = (time.time() - data['timestamp']) / 3600
-            if age_hours > max_age_hours:
-                cache_path.unlink(missing_ok=True)
-                return None
-            
-            return data['content']
-        
+            return decode_entry(blob)
         except Exception as e:
+            # Writes are atomic, so this is real corruption rather than a write in progress
             print(f"Cache read error: {e}")
             cache_path.unlink(missing_ok=True)
             return None
     
-    def set(self, key: str, content: str) -> None:
-        """Store content in cache"""
-        cache_path = self._get_cache_path(key)
+    def delete(self, key: str) -> None:
+        self._get_cache_path(key).unlink(missing_ok=True)
+    
+    def _write(self, key: str, data: Dict[str, Any]) -> None:
+        atomic_write(self._get_cache_path(key), encode_entry(data))
+
+class TieredCache:
+    """In-process LRU cache in front of a CacheBackend.
+    
+    Entries keep the timestamp they were written with, so TTL checks behave
+    the same as the backend. Only a cold process has to read from it.
+    """
+    
+    def __init__(self, backend: CacheBackend, max_bytes: int = 64 * 1024 * 1024):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _remember(self, key: str, data: Dict[str, Any]) -> None:
+        self._forget(key)
+        size = sys.getsizeof(data['content']) + sum(len(body) for body in data.get('encodings', {}).values())
+        if size > self.max_bytes:
+            return  # Would evict everything else; leave it on disk only
+        
+        self._entries[key] = (data, size)
+        self._bytes += size
+        
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+    
+    def _forget(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry[1]
+    
+    def in_memory(self, key: str) -> bool:
+        """Whether get_entry(key) is answered without reading the backend"""
+        return key in self._entries
+    
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the cache entry (content, timestamp, etag) without expiring it"""
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        
+        self.misses += 1
+        data = self.backend.get_entry(key)
+        if data is not None:
+            self._remember(key, data)
+        return data
+    
+    def get_with_age(self, key: str) -> Tuple[Optional[str], float]:
+        """Get cached value and its age in hours without expiring it"""
+        data = self.get_entry(key)
+        if data is None:
+            return None, float('inf')
+        
+        return data['content'], (time.time() - data['timestamp']) / 3600
+    
+    def get(self, key: str, max_age_hours: int = 24) -> Optional[str]:
+        """Get cached value if it exists and isn't expired"""
+        content, age_hours = self.get_with_age(key)
+        if content is None:
+            return None
+        
+        if age_hours > max_age_hours:
+            self._forget(key)
+            # Let the backend expire its copy too
+            return self.backend.get(key, max_age_hours=max_age_hours)
+        
+        return content
+    
+    def reload_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Re-read key from the backend, e.g. after another worker rewrote it"""
+        data = self.backend.get_entry(key)
+        if data is None:
+            self._forget(key)
+        else:
+            self._remember(key, data)
+        return data
+    
+    def lock(self, key: str):
+        return self.backend.lock(key)
+    
+    def set(self, key: str, content: str, encodings: Optional[Dict[str, bytes]] = None,
+            etag: Optional[str] = None, modified: Optional[float] = None) -> Dict[str, Any]:
+        """Store content in both tiers and return the stored entry"""
+        data = self.backend.set(key, content, encodings, etag, modified)
+        self._remember(key, data)
+        return data
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+        }
+
+
+class ItemCache:
+    """LRU of serialized feed <item> fragments.
+    
+    Items only depend on their key and on texts that never change, so a
+    rebuild can reuse every item that's still in its feed's window and
+    only render the ones that slid in.
+    """
+    
+    def __init__(self, max_items: int = 256):
+        self.max_items = max_items
+        self._items: "OrderedDict[Tuple, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple) -> Optional[str]:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item
+    
+    def set(self, key: Tuple, item: str) -> None:
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._items.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._items)}
+
+
+def texts_overlap(stored_ref: Optional[str], ref: str) -> bool:
+    """Whether the text stored for stored_ref shares verses with ref; refs that don't parse only match exactly"""
+    if stored_ref == ref:
+        return True
+    try:
+        return refs_overlap(stored_ref, ref)
+    except (TypeError, ValueError):
+        return False
+
+class TextStore:
+    """Long-lived on-disk store of raw Sefaria text responses.
+    
+    Torah text for a given ref/version/language never changes, so entries
+    don't expire; use invalidate() to drop them explicitly.
+    """
+    
+    def __init__(self, store_dir: str = "/tmp/torah_cache/texts", max_memory: int = 512):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        # Most recently used entries, kept in memory; key -> stored entry
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_memory = max_memory
+        # Touched by invalidate(), so every process sharing the store notices
+        self._marker = self.store_dir / ".invalidated"
+        self._generation = 0
+        self.generation()
+    
+    def generation(self) -> int:
+        """Changes whenever any process invalidates the store.
+        
+        When it has changed since the last call, entries kept in memory are dropped.
+        """
+        try:
+            generation = self._marker.stat().st_mtime_ns
+        except FileNotFoundError:
+            generation = 0
+        if generation != self._generation:
+            self._memory.clear()
+        self._generation = generation
+        return generation
+    
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+    
+    def _key(self, ref: str, version: str, language: str) -> str:
+        return hashlib.sha256(f"{ref}|{version}|{language}".encode('utf-8')).hexdigest()
+    
+    def _get_path(self, key: str) -> Path:
+        return self.store_dir / f"{key}.json"
+    
+    def get(self, ref: str, version: str, language: str) -> Optional[Dict[str, Any]]:
+        """Get a stored response, or None if it was never stored"""
+        self.generation()
+        key = self._key(ref, version, language)
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]['data']
+        
+        path = self._get_path(key)
+        if not path.exists():
+            return None
+        
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            self._remember(key, entry)
+            return entry['data']
+        
+        except Exception as e:
+            print(f"Text store read error: {e}")
+            path.unlink(missing_ok=True)
+            return None
+    
+    def set(self, ref: str, version: str, language: str, data: Dict[str, Any]) -> None:
+        """Store a response"""
+        key = self._key(ref, version, language)
+        entry = {
+            'ref': ref,
+            'version': version,
+            'language': language,
+            'data': data,
+            'timestamp': time.time()
+        }
+        self._remember(key, entry)
         
         try:
-            data = {
-                'content': content,
-                'timestamp': time.time()
-            }
-            
-            with open(cache_path, 'w') as f:
-                json.dump(data, f)
+            atomic_write(self._get_path(key), json.dumps(entry).encode('utf-8'))
+        except Exception as e:
+            print(f"Text store write error: {e}")
+    
+    def invalidate(self, ref: Optional[str] = None) -> int:
+        """Drop stored texts overlapping ref (all versions/languages), or everything.
         
+        Overlapping refs go too, since e.g. a day's slice of a portion holds
+        the same verses as the portion itself. Other processes sharing the store drop what they keep in memory the
+        next time they read from it. Returns the number of entries removed
+        from disk.
+        """
+        removed = 0
+        for path in self.store_dir.glob("*.json"):
+            try:
+                if ref is not None:
+                    with open(path, 'r') as f:
+                        if not texts_overlap(json.load(f).get('ref'), ref):
+                            continue
+                path.unlink(missing_ok=True)
+                removed += 1
+            except Exception as e:
+                print(f"Text store invalidate error: {e}")
+        
+        try:
+            self._marker.write_text(str(time.time_ns()))
         except Exception as e:
-            print(f"Cache write error: {e}")
\ No newline at end of file
+            print(f"Text store invalidate error: {e}")
+        self._memory.clear()
+        self.generation()
+        return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drop raw Sefaria texts from the text store, e.g. after an upstream correction")
+    parser.add_argument("--store-dir", default=os.environ.get("TEXT_STORE_DIR", "/tmp/torah_cache/texts"))
+    parser.add_argument("--ref", help="Only drop texts overlapping this ref, e.g. Genesis.1.1-6.8; everything by default")
+    args = parser.parse_args()
+    
+    # Running workers sharing the store re-read texts and re-render at their next rebuild
+    removed = TextStore(args.store_dir).invalidate(args.ref)
+    print(f"Removed {removed} stored texts from {args.store_dir}")
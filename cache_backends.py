@@ -0,0 +1,320 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from cache import CacheBackend, FileCache, FileLock, decode_entry, encode_entry, fcntl, safe_key
+
+BACKENDS = ("file", "sqlite", "mmap", "redis", "local")
+
+class SQLiteCache(CacheBackend):
+    """Entries in a single SQLite database in WAL mode.
+    
+    WAL lets every worker on the host read while one of them writes. Each
+    row holds just the key and the encode_entry bytes, like the other
+    backends.
+    """
+    
+    def __init__(self, path: str = "/tmp/torah_cache/feeds.db"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        connection = self._connection()
+        # Older databases also had timestamp, etag and encodings columns, which
+        # duplicated the body's index; it's only a cache, so start it afresh
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(entries)")]
+        if columns and columns != ["key", "body"]:
+            connection.execute("DROP TABLE entries")
+        connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, body BLOB NOT NULL)")
+    
+    def _connection(self) -> sqlite3.Connection:
+        # Connections can't be shared across threads or forked workers
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+    
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT body FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        
+        try:
+            return decode_entry(row[0])
+        except Exception as e:
+            print(f"Cache read error: {e}")
+            self.delete(key)
+            return None
+    
+    def _write(self, key: str, data: Dict[str, Any]) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO entries (key, body) VALUES (?, ?)",
+            (key, b"".join(encode_entry(data)))
+        )
+    
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+    
+    def lock(self, key: str) -> FileLock:
+        return FileLock(self.path.with_name(f"{self.path.name}.{safe_key(key)}.lock"))
+
+
+# File layout: FILE_HEADER (magic, slot count, slot size) padded to HEADER_SIZE,
+# then fixed-size slots. Each slot starts with SLOT_HEADER (sequence, key,
+# timestamp, length) padded to SLOT_HEADER_SIZE, followed by encode_entry bytes.
+MMAP_MAGIC = b"TORMMAP1"
+FILE_HEADER = struct.Struct("<8sII")
+SLOT_HEADER = struct.Struct("<Q64sdI")
+HEADER_SIZE = 64
+SLOT_HEADER_SIZE = 128
+
+class MmapCache(CacheBackend):
+    """Shared-memory cache: a memory-mapped file of fixed-size slots.
+    
+    Workers map the same file, so an entry written by one is visible to
+    all of them without a copy through the kernel. Writers serialize on an
+    flock of the file. Readers take no lock; they check each slot's sequence
+    number, which is odd while a write is in progress, before and after
+    copying it out. When every slot is in use the oldest entry is replaced.
+    
+    The slot count and size are part of the file name, so changing them
+    starts a new file rather than relaying out one that running workers
+    still have mapped.
+    """
+    
+    def __init__(self, path: str = "/tmp/torah_cache/feeds.mmap", slots: int = 16,
+                 slot_bytes: int = 4 * 1024 * 1024):
+        path = Path(path)
+        self.path = path.with_name(f"{path.stem}.{slots}x{slot_bytes}{path.suffix}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._fd: Optional[int] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._pid: Optional[int] = None
+    
+    def _map(self) -> mmap.mmap:
+        if self._pid == os.getpid():
+            return self._mmap
+        
+        size = HEADER_SIZE + self.slots * self.slot_bytes
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._exclusive():
+            header = os.pread(self._fd, FILE_HEADER.size, 0)
+            layout = FILE_HEADER.pack(MMAP_MAGIC, self.slots, self.slot_bytes)
+            if not header.strip(b"\0"):
+                # New file, or one whose layout was interrupted before the header went in
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, layout, 0)
+                header = layout
+            matches = header == layout and os.fstat(self._fd).st_size == size
+        if not matches:
+            # Resizing it would pull the pages out from under workers that mapped it
+            os.close(self._fd)
+            self._fd = None
+            raise RuntimeError(f"{self.path} isn't laid out as {self.slots} slots of "
+                               f"{self.slot_bytes} bytes; remove it or use another CACHE_DIR")
+        self._mmap = mmap.mmap(self._fd, size)
+        self._pid = os.getpid()
+        return self._mmap
+    
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the writers' flock on the mapped file"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    def _key_bytes(self, key: str) -> bytes:
+        raw = key.encode('utf-8')
+        return raw if len(raw) <= 64 else hashlib.sha256(raw).hexdigest().encode('ascii')
+    
+    def _slot_offset(self, slot: int) -> int:
+        return HEADER_SIZE + slot * self.slot_bytes
+    
+    def _read_header(self, slot: int) -> Tuple[int, bytes, float, int]:
+        sequence, key, timestamp, length = SLOT_HEADER.unpack_from(self._map(), self._slot_offset(slot))
+        return sequence, key.rstrip(b"\0"), timestamp, length
+    
+    def _find(self, key: bytes) -> Optional[int]:
+        for slot in range(self.slots):
+            if self._read_header(slot)[1] == key:
+                return slot
+        return None
+    
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        mm = self._map()
+        key_bytes = self._key_bytes(key)
+        slot = self._find(key_bytes)
+        if slot is None:
+            return None
+        
+        offset = self._slot_offset(slot)
+        for _ in range(100):
+            sequence, slot_key, _, length = self._read_header(slot)
+            if sequence % 2:
+                time.sleep(0)  # A writer is mid-update
+                continue
+            blob = mm[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + length]
+            if self._read_header(slot)[0] != sequence:
+                continue
+            if slot_key != key_bytes:
+                return None  # Replaced by another key since _find
+            try:
+                return decode_entry(blob)
+            except Exception as e:
+                print(f"Cache read error: {e}")
+                return None
+        return None
+    
+    def _update(self, slot: int, key: bytes, timestamp: float, payload: bytes) -> None:
+        mm = self._map()
+        offset = self._slot_offset(slot)
+        sequence = self._read_header(slot)[0]
+        # Odd sequence marks the slot as being written
+        struct.pack_into("<Q", mm, offset, sequence + 1)
+        mm[offset + SLOT_HEADER_SIZE:offset + SLOT_HEADER_SIZE + len(payload)] = payload
+        SLOT_HEADER.pack_into(mm, offset, sequence + 1, key, timestamp, len(payload))
+        struct.pack_into("<Q", mm, offset, sequence + 2)
+    
+    def _write(self, key: str, data: Dict[str, Any]) -> None:
+        payload = b"".join(encode_entry(data))
+        if len(payload) > self.slot_bytes - SLOT_HEADER_SIZE:
+            raise ValueError(f"{key} is {len(payload)} bytes, larger than a {self.slot_bytes} byte slot")
+        
+        key_bytes = self._key_bytes(key)
+        self._map()
+        with self._exclusive():
+            slot = self._find(key_bytes)
+            if slot is None:
+                # An empty slot has timestamp 0, so it's also the oldest
+                slot = min(range(self.slots), key=lambda s: self._read_header(s)[2])
+            self._update(slot, key_bytes, data['timestamp'], payload)
+    
+    def delete(self, key: str) -> None:
+        key_bytes = self._key_bytes(key)
+        self._map()
+        with self._exclusive():
+            slot = self._find(key_bytes)
+            if slot is not None:
+                self._update(slot, b"", 0.0, b"")
+    
+    def lock(self, key: str) -> FileLock:
+        return FileLock(self.path.with_name(f"{self.path.name}.{safe_key(key)}.lock"))
+
+
+class LocalKeyValueStore:
+    """In-process stand-in for the part of the redis-py client KeyValueCache uses.
+    
+    Lets the key-value backend run, and be tested, without a Redis server.
+    """
+    
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+    
+    def get(self, name: str) -> Optional[bytes]:
+        item = self._data.get(name)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and time.monotonic() >= expires:
+            del self._data[name]
+            return None
+        return value
+    
+    def set(self, name: str, value: Union[bytes, str], ex: Optional[float] = None,
+            px: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self.get(name) is not None:
+            return None
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self._data[name] = (value, time.monotonic() + ttl if ttl is not None else None)
+        return True
+    
+    def delete(self, *names: str) -> int:
+        return sum(self._data.pop(name, None) is not None for name in names)
+
+class KeyValueLock:
+    """Lock held as a key with a TTL, so a crashed worker can't hold it forever"""
+    
+    def __init__(self, client, name: str, ttl_seconds: float = 120):
+        self.client = client
+        self.name = name
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = os.urandom(16).hex().encode('ascii')
+    
+    def acquire(self) -> bool:
+        return bool(self.client.set(self.name, self.token, nx=True, px=self.ttl_ms))
+    
+    def release(self) -> None:
+        # Only delete the lock if it's still ours rather than a later holder's
+        if self.client.get(self.name) == self.token:
+            self.client.delete(self.name)
+
+class KeyValueCache(CacheBackend):
+    """Entries stored as encode_entry bytes in a Redis-style key-value store.
+    
+    client needs get, set (with ex/px/nx) and delete, as in redis-py; calls
+    are synchronous, which is fine for a store on the same network.
+    """
+    
+    def __init__(self, client, prefix: str = "torah:"):
+        self.client = client
+        self.prefix = prefix
+    
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        blob = self.client.get(f"{self.prefix}feed:{key}")
+        if blob is None:
+            return None
+        
+        try:
+            return decode_entry(blob)
+        except Exception as e:
+            print(f"Cache read error: {e}")
+            self.delete(key)
+            return None
+    
+    def _write(self, key: str, data: Dict[str, Any]) -> None:
+        self.client.set(f"{self.prefix}feed:{key}", b"".join(encode_entry(data)))
+    
+    def delete(self, key: str) -> None:
+        self.client.delete(f"{self.prefix}feed:{key}")
+    
+    def lock(self, key: str) -> KeyValueLock:
+        return KeyValueLock(self.client, f"{self.prefix}lock:{key}")
+
+
+def create_backend(name: str, cache_dir: str = "/tmp/torah_cache", redis_url: Optional[str] = None,
+                   mmap_slots: int = 16, mmap_slot_bytes: int = 4 * 1024 * 1024) -> CacheBackend:
+    """Build the cache backend called name, one of BACKENDS"""
+    if name == "file":
+        return FileCache(cache_dir)
+    if name == "sqlite":
+        return SQLiteCache(os.path.join(cache_dir, "feeds.db"))
+    if name == "mmap":
+        return MmapCache(os.path.join(cache_dir, "feeds.mmap"), mmap_slots, mmap_slot_bytes)
+    if name == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis cache backend needs the redis package (pip install redis)")
+        return KeyValueCache(redis.Redis.from_url(redis_url or "redis://localhost:6379/0"))
+    if name == "local":
+        # Same code path as redis with an in-process store; not shared between workers
+        return KeyValueCache(LocalKeyValueStore())
+    raise ValueError(f"Unknown cache backend {name!r}; expected one of {', '.join(BACKENDS)}")
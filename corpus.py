@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from cache import atomic_write
+from parashot import TORAH_PORTION_MAP, parse_ref
+
+# File layout: MAGIC, little-endian uint32 index length, JSON index, UTF-8 verse blob.
+# The index holds, per book and chapter, the blob offsets of each verse boundary.
+MAGIC = b"TORAHC01"
+HEADER = struct.Struct("<8sI")
+
+class Corpus:
+    """Read-only, memory-mapped Torah text bundle built by build_corpus"""
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._mmap = None
+        self._index = None
+        self._exists = None
+        self._blob_start = 0
+        self._exists: Optional[bool] = None
+    
+    def exists(self) -> bool:
+        """Whether the corpus file is there; checked once, until close()"""
+        if self._exists is None:
+            self._exists = self.path.exists()
+        return self._exists
+    
+    def _load(self) -> None:
+        if self._index is not None:
+            return
+        
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a Torah corpus file")
+        
+        self._index = json.loads(self._mmap[HEADER.size:HEADER.size + index_length])
+        self._blob_start = HEADER.size + index_length
+    
+    @property
+    def version_title(self) -> str:
+        self._load()
+        return self._index.get('versionTitle', '')
+    
+    @property
+    def version_source(self) -> str:
+        self._load()
+        return self._index.get('versionSource', '')
+    
+    def _verse(self, offsets: List[int], verse: int) -> str:
+        start = self._blob_start + offsets[verse - 1]
+        end = self._blob_start + offsets[verse]
+        return self._mmap[start:end].decode('utf-8')
+    
+    def has_ref(self, ref: str) -> bool:
+        """True if every chapter of ref is in the corpus"""
+        if self._index is None and not self.exists():
+            return False
+        try:
+            book, _, _, end_chapter, _ = parse_ref(ref)
+            self._load()
+            return len(self._index['books'].get(book, [])) >= end_chapter
+        except ValueError:
+            return False
+    
+    def get_ref(self, ref: str) -> List[List[str]]:
+        """Get the verses of ref grouped by chapter, in the same shape as a sliced Sefaria response"""
+        book, start_chapter, start_verse, end_chapter, end_verse = parse_ref(ref)
+        self._load()
+        chapters = self._index['books'][book]
+        
+        text = []
+        for chapter in range(start_chapter, end_chapter + 1):
+            offsets = chapters[chapter - 1]
+            first = start_verse if chapter == start_chapter else 1
+            last = min(end_verse, len(offsets) - 1) if chapter == end_chapter else len(offsets) - 1
+            text.append([self._verse(offsets, verse) for verse in range(first, last + 1)])
+        return text
+    
+    def close(self) -> None:
+        if self._mmap:
+            self._mmap.close()
+        self._mmap = None
+        self._index = None
+        self._exists = None
+
+
+def write_corpus(path: str, books: Dict[str, List[List[str]]], version_title: str = '', version_source: str = '') -> None:
+    """Write whole-chapter book texts to a corpus file"""
+    blob = bytearray()
+    index_books = {}
+    for book, chapters in books.items():
+        index_chapters = []
+        for verses in chapters:
+            offsets = [len(blob)]
+            for verse in verses:
+                blob += verse.encode('utf-8')
+                offsets.append(len(blob))
+            index_chapters.append(offsets)
+        index_books[book] = index_chapters
+    
+    index = json.dumps({
+        'versionTitle': version_title,
+        'versionSource': version_source,
+        'books': index_books
+    }, separators=(',', ':')).encode('utf-8')
+    
+    atomic_write(Path(path), [HEADER.pack(MAGIC, len(index)), index, blob])
+
+
+async def fetch_books(sefaria_client) -> Dict[str, Any]:
+    """Fetch the whole chapters covered by every mapped parasha from Sefaria"""
+    books: Dict[str, Dict[int, List[str]]] = {}
+    version_title = version_source = ''
+    
+    for parasha_name, ref in TORAH_PORTION_MAP.items():
+        book, start_chapter, _, end_chapter, _ = parse_ref(ref)
+        have = books.setdefault(book, {})
+        missing = [c for c in range(start_chapter, end_chapter + 1) if c not in have]
+        if not missing:
+            continue
+        
+        # Whole chapters, so verse numbering in the corpus is exact
+        chapter_ref = f"{book}.{missing[0]}" if len(missing) == 1 else f"{book}.{missing[0]}-{missing[-1]}"
+        data = await sefaria_client.fetch_text(chapter_ref)
+        if data is None:
+            raise RuntimeError(f"Could not fetch {chapter_ref} for {parasha_name}")
+        
+        text = data.get('text', [])
+        if text and not isinstance(text[0], list):
+            text = [text]  # Single chapter responses are flat
+        for offset, verses in enumerate(text):
+            have[missing[0] + offset] = verses
+        
+        version_title = data.get('versionTitle', version_title)
+        version_source = data.get('versionSource', version_source)
+        print(f"Fetched {chapter_ref}")
+    
+    return {
+        'versionTitle': version_title,
+        'versionSource': version_source,
+        'books': {book: [chapters[c] for c in sorted(chapters)] for book, chapters in books.items()}
+    }
+
+
+async def build_corpus(output_path: str, dump_path: Optional[str] = None) -> None:
+    """Build the corpus from Sefaria, or from a local JSON dump.
+    
+    The dump uses the same shape fetch_books returns:
+    {"versionTitle": ..., "versionSource": ..., "books": {"Genesis": [[verse, ...], ...], ...}}
+    """
+    if dump_path:
+        with open(dump_path, 'r') as f:
+            data = json.load(f)
+    else:
+        from sefaria_client import SefariaClient
+        client = SefariaClient()
+        try:
+            data = await fetch_books(client)
+        finally:
+            await client.close()
+    
+    write_corpus(output_path, data['books'], data.get('versionTitle', ''), data.get('versionSource', ''))
+    verses = sum(len(chapter) for chapters in data['books'].values() for chapter in chapters)
+    print(f"Wrote {verses} verses to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline Torah corpus bundle")
+    parser.add_argument("--output", default=os.environ.get("CORPUS_PATH", "torah_corpus.bin"))
+    parser.add_argument("--dump", help="Build from a local JSON dump instead of Sefaria")
+    args = parser.parse_args()
+    asyncio.run(build_corpus(args.output, args.dump))
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from parashot import TORAH_PORTION_MAP, parse_ref
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+BOOKS = ["Genesis", "Exodus", "Leviticus", "Numbers", "Deuteronomy"]
+
+# Verse = (chapter, verse)
+Verse = Tuple[int, int]
+
+def format_range(book: str, start: Verse, end: Verse) -> str:
+    """Human-readable range, e.g. Genesis 6:9-7:16 or Genesis 4:19-22"""
+    if start == end:
+        return f"{book} {start[0]}:{start[1]}"
+    if start[0] == end[0]:
+        return f"{book} {start[0]}:{start[1]}-{end[1]}"
+    return f"{book} {start[0]}:{start[1]}-{end[0]}:{end[1]}"
+
+def to_api_ref(book: str, start: Verse, end: Verse) -> str:
+    """Sefaria API ref, e.g. Genesis.6.9-7.16, the format TORAH_PORTION_MAP uses"""
+    return f"{book}.{start[0]}.{start[1]}-{end[0]}.{end[1]}"
+
+_HUMAN_REF = re.compile(r'^(?P<book>[A-Za-z ]+?) (?P<sc>\d+):(?P<sv>\d+)(?:-(?:(?P<ec>\d+):)?(?P<ev>\d+))?$')
+
+def parse_human_ref(ref: str) -> Tuple[str, Verse, Verse]:
+    """Parse Sefaria display refs, e.g. Genesis 4:19-22 or Genesis 1:1-2:3"""
+    match = _HUMAN_REF.match(ref)
+    if not match:
+        raise ValueError(f"Unsupported reference: {ref}")
+    start = (int(match['sc']), int(match['sv']))
+    end_chapter = int(match['ec'] or match['sc'])
+    end = (end_chapter, int(match['ev'] or match['sv']))
+    return match['book'], start, end
+
+def number_verses(text: List[List[str]], ref: str) -> List[Tuple[Verse, str]]:
+    """Attach (chapter, verse) numbers to portion text sliced to ref"""
+    _, start_chapter, start_verse, _, _ = parse_ref(ref)
+    numbered = []
+    for chapter_offset, chapter in enumerate(text):
+        first_verse = start_verse if chapter_offset == 0 else 1
+        for verse_offset, verse in enumerate(chapter):
+            numbered.append(((start_chapter + chapter_offset, first_verse + verse_offset), verse))
+    return numbered
+
+def balance(count: int, days: int = 7) -> List[Tuple[int, int]]:
+    """Split count verses into days contiguous [start, end) index ranges of near-equal size.
+    
+    The remainder goes one verse at a time to the earliest days instead of
+    piling up on the last one.
+    """
+    base, extra = divmod(count, days)
+    ranges = []
+    start = 0
+    for day in range(days):
+        size = base + (1 if day < extra else 0)
+        ranges.append((start, start + size))
+        start += size
+    return ranges
+
+class DailyDivider:
+    """Splits a parasha into seven daily readings.
+    
+    Uses the traditional aliyah boundaries from a precomputed table (the
+    committed aliyot.json) when the parasha is in it, and balances verse
+    counts otherwise, as for combined parashot.
+    """
+    
+    def __init__(self, aliyot_path: Optional[str] = None):
+        self.aliyot_path = Path(aliyot_path) if aliyot_path else None
+        self._aliyot = None
+    
+    @property
+    def aliyot(self) -> Dict[str, List[str]]:
+        if self._aliyot is None:
+            self._aliyot = {}
+            if self.aliyot_path and self.aliyot_path.exists():
+                try:
+                    with open(self.aliyot_path, 'r') as f:
+                        self._aliyot = json.load(f)
+                except Exception as e:
+                    print(f"Error loading aliyot table {self.aliyot_path}: {e}")
+            elif self.aliyot_path:
+                print(f"Aliyot table {self.aliyot_path} not found; balancing daily readings by verse count")
+        return self._aliyot
+    
+    def aliyah_refs(self, parasha_name: str) -> Optional[List[str]]:
+        """The seven daily API refs for parasha_name, if its aliyot are known"""
+        refs = self.aliyot.get(parasha_name)
+        return refs if refs and len(refs) == 7 else None
+    
+    def balanced_days(self, numbered: List[Tuple[Verse, str]], book: str) -> List[Dict[str, object]]:
+        """Divide numbered verses into seven balanced days with exact ranges"""
+        days = []
+        for start, end in balance(len(numbered)):
+            verses = numbered[start:end]
+            days.append({
+                'verses': verses,
+                'verse_range': format_range(book, verses[0][0], verses[-1][0]) if verses else ""
+            })
+        return days
+
+
+async def fetch_aliyot(sefaria_client) -> Dict[str, List[str]]:
+    """Build the aliyot table from Sefaria's index alt structures"""
+    by_whole_ref = {}
+    session = await sefaria_client.get_session()
+    for book in BOOKS:
+        async with session.get(f"{sefaria_client.base_url}/v2/raw/index/{book}") as response:
+            response.raise_for_status()
+            index = await response.json()
+        for node in index.get('alt_structs', {}).get('Parasha', {}).get('nodes', []):
+            _, start, end = parse_human_ref(node['wholeRef'])
+            by_whole_ref[to_api_ref(book, start, end)] = node.get('refs', [])
+    
+    table = {}
+    for parasha_name, ref in TORAH_PORTION_MAP.items():
+        aliyot = by_whole_ref.get(ref)
+        if not aliyot or len(aliyot) != 7:
+            continue
+        table[parasha_name] = [to_api_ref(*parse_human_ref(aliyah)) for aliyah in aliyot]
+    return table
+
+
+async def build_aliyot(output_path: str, dump_path: Optional[str] = None) -> None:
+    """Write the aliyot table from Sefaria, or from a local JSON dump of the same shape"""
+    if dump_path:
+        with open(dump_path, 'r') as f:
+            table = json.load(f)
+    else:
+        from sefaria_client import SefariaClient
+        client = SefariaClient()
+        try:
+            table = await fetch_aliyot(client)
+        finally:
+            await client.close()
+    
+    with open(output_path, 'w') as f:
+        json.dump(table, f, indent=1)
+    print(f"Wrote aliyot for {len(table)} parashot to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the aliyot table used for daily readings")
+    parser.add_argument("--output", default=os.environ.get("ALIYOT_PATH", "aliyot.json"))
+    parser.add_argument("--dump", help="Build from a local JSON dump instead of Sefaria")
+    args = parser.parse_args()
+    asyncio.run(build_aliyot(args.output, args.dump))
@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from cache import TextStore, compress_variants, make_etag, variant_etag
+from corpus import Corpus
+from daily_division import DailyDivider
+from rss_generator import RSSGenerator
+from sefaria_client import SefariaClient
+from torah_calendar import TorahCalendar
+
+# Upcoming parashot per feed, as app.render_feed requests them
+FEED_COUNTS = {"weekly": 8, "daily": 4}
+LOCATIONS = ("diaspora", "israel")
+# File suffix of each precompressed sibling
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+async def render_feeds(locations: Tuple[str, ...], max_concurrency: int = 4,
+                       pretty: bool = True) -> Dict[Tuple[str, str], Tuple[str, List[str]]]:
+    """Render every feed kind for each location, keyed by (kind, location).
+    
+    Each value is the feed and the names of the parashot left out of it
+    because their text couldn't be fetched or rendered.
+    """
+    client = SefariaClient(
+        text_store=TextStore(os.environ.get("TEXT_STORE_DIR", "/tmp/torah_cache/texts")),
+        corpus=Corpus(os.environ.get("CORPUS_PATH", "torah_corpus.bin")),
+        divider=DailyDivider(os.environ.get("ALIYOT_PATH", "aliyot.json"))
+    )
+    calendar = TorahCalendar(session_getter=client.get_session)
+    generator = RSSGenerator(max_concurrency=max_concurrency, pretty=pretty)
+    
+    async def render(kind: str, location: str) -> Tuple[str, List[str]]:
+        upcoming_parashot = await calendar.get_upcoming_parashot_async(location, count=FEED_COUNTS[kind])
+        failed = []
+        if kind == "weekly":
+            stream = generator.stream_upcoming_weekly_feed(upcoming_parashot, location, client, failed)
+        else:
+            stream = generator.stream_upcoming_daily_feed(upcoming_parashot, location, client, failed)
+        return "".join([chunk async for chunk in stream]), failed
+    
+    variants = [(kind, location) for kind in FEED_COUNTS for location in locations]
+    try:
+        feeds = await asyncio.gather(*(render(kind, location) for kind, location in variants))
+    finally:
+        await calendar.close()
+        await client.close()
+    return dict(zip(variants, feeds))
+
+def write_feed(root: Path, path: str, content: str, timestamp: float) -> Dict[str, Any]:
+    """Write content and its precompressed siblings under root; return its manifest record"""
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    etag = make_etag(content)
+    encodings = compress_variants(content)
+    
+    files = {"identity": (target, content.encode('utf-8'))}
+    for encoding, body in encodings.items():
+        files[encoding] = (target.with_name(target.name + SUFFIXES[encoding]), body)
+    for file_path, body in files.values():
+        file_path.write_bytes(body)
+        # Static servers derive Last-Modified from the file's mtime
+        os.utime(file_path, (timestamp, timestamp))
+    
+    return {
+        "path": path,
+        "etag": etag,
+        "etags": {encoding: variant_etag(etag, encoding) for encoding in encodings},
+        "last_modified": formatdate(timestamp, usegmt=True),
+        "bytes": {encoding: len(body) for encoding, (_, body) in files.items()},
+        "items": content.count("<item>"),
+    }
+
+def swap_in(output: Path, staged: Path, keep: int = 2) -> None:
+    """Point the output symlink at staged in one rename, then prune old exports.
+    
+    The previous export is kept (keep counts it and the new one) so a
+    server that is mid-read of it isn't left with missing files.
+    """
+    link = output.with_name(f".{output.name}.link-{os.getpid()}")
+    os.symlink(staged.name, link)
+    os.replace(link, output)
+    
+    exports = sorted(output.parent.glob(f".{output.name}-*"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in exports[keep:]:
+        if old != staged:
+            shutil.rmtree(old, ignore_errors=True)
+
+async def export(output: str, locations: Tuple[str, ...] = LOCATIONS, max_concurrency: int = 4,
+                 pretty: bool = True, allow_empty: bool = False, keep: int = 2,
+                 allow_partial: bool = False) -> Dict[str, Any]:
+    """Render all feeds into a fresh directory and atomically make output point at it.
+    
+    output becomes a symlink to the newest export; serve from it, not from
+    the hidden versioned directories next to it. Nothing is swapped in if
+    rendering fails, unless allow_partial if any feed is missing portions,
+    or unless allow_empty if any feed has no items.
+    """
+    output_path = Path(output).absolute()
+    if output_path.exists() and not output_path.is_symlink():
+        raise RuntimeError(f"{output_path} exists and isn't a symlink from an earlier export; move it away first")
+    
+    feeds = await render_feeds(locations, max_concurrency, pretty)
+    # As with the app's cache, a feed missing portions doesn't replace a complete one
+    partial = [f"{kind}/{location} ({', '.join(failed)})" for (kind, location), (_, failed) in feeds.items() if failed]
+    if partial and not allow_partial:
+        raise RuntimeError(f"Portions missing from {'; '.join(partial)}; keeping the previous export")
+    empty = [f"{kind}/{location}" for (kind, location), (content, _) in feeds.items() if "<item>" not in content]
+    if empty and not allow_empty:
+        raise RuntimeError(f"No items in {', '.join(empty)}; keeping the previous export")
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    staged = Path(tempfile.mkdtemp(dir=output_path.parent, prefix=f".{output_path.name}-"))
+    try:
+        staged.chmod(0o755)
+        timestamp = time.time()
+        manifest = {"generated": formatdate(timestamp, usegmt=True), "feeds": {}}
+        for (kind, location), (content, _) in feeds.items():
+            manifest["feeds"][f"/feeds/{kind}/{location}"] = write_feed(
+                staged, f"feeds/{kind}/{location}.xml", content, timestamp)
+            if location == "diaspora":
+                # /feeds/weekly and /feeds/daily default to the diaspora schedule
+                manifest["feeds"][f"/feeds/{kind}"] = write_feed(staged, f"feeds/{kind}.xml", content, timestamp)
+        (staged / "manifest.json").write_text(json.dumps(manifest, indent=1))
+    except Exception:
+        shutil.rmtree(staged, ignore_errors=True)
+        raise
+    
+    swap_in(output_path, staged, keep)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every feed, with precompressed copies, for a static server")
+    parser.add_argument("--output", default="static_feeds",
+                        help="Symlink to the current export; created or atomically replaced")
+    parser.add_argument("--locations", nargs="+", default=list(LOCATIONS), choices=LOCATIONS)
+    parser.add_argument("--max-concurrency", type=int, default=int(os.environ.get("SEFARIA_MAX_CONCURRENCY", 4)))
+    parser.add_argument("--keep", type=int, default=2, help="Exports to keep on disk, including the new one")
+    parser.add_argument("--allow-empty", action="store_true", help="Publish feeds even if they have no items")
+    parser.add_argument("--allow-partial", action="store_true",
+                        help="Publish feeds even if some portions couldn't be fetched or rendered")
+    args = parser.parse_args()
+    
+    try:
+        manifest = asyncio.run(export(args.output, tuple(args.locations), args.max_concurrency,
+                                      os.environ.get("PRETTY_XML", "1") == "1", args.allow_empty, max(1, args.keep),
+                                      args.allow_partial))
+    except Exception as e:
+        print(f"Export failed: {e}")
+        sys.exit(1)
+    for route, record in manifest["feeds"].items():
+        print(f"{route}: {record['items']} items, {record['bytes']['identity']} bytes, ETag {record['etag']}")
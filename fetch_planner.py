@@ -0,0 +1,75 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from parashot import parse_ref
+
+# (book, first chapter, last chapter)
+Span = Tuple[str, int, int]
+
+def chapter_span(ref: str) -> Span:
+    """Whole chapters a verse ref like "Genesis.6.9-11.32" falls in"""
+    book, start_chapter, _, end_chapter, _ = parse_ref(ref)
+    return book, start_chapter, end_chapter
+
+def plan_fetches(refs: Iterable[str]) -> List[Span]:
+    """Merge refs into the fewest whole-chapter spans that cover them all.
+    
+    Overlapping refs, and refs in the same or consecutive chapters, share a
+    span; a window of consecutive portions becomes one span per book.
+    Spans come back in the order their books first appear in refs.
+    """
+    by_book: Dict[str, List[Tuple[int, int]]] = {}
+    for ref in refs:
+        book, start_chapter, end_chapter = chapter_span(ref)
+        by_book.setdefault(book, []).append((start_chapter, end_chapter))
+    
+    spans = []
+    for book, ranges in by_book.items():
+        ranges.sort()
+        start, end = ranges[0]
+        for next_start, next_end in ranges[1:]:
+            if next_start <= end + 1:
+                end = max(end, next_end)
+            else:
+                spans.append((book, start, end))
+                start, end = next_start, next_end
+        spans.append((book, start, end))
+    return spans
+
+def span_ref(span: Span) -> str:
+    """Sefaria ref for the whole chapters of span, e.g. "Genesis.6-25" """
+    book, start_chapter, end_chapter = span
+    if start_chapter == end_chapter:
+        return f"{book}.{start_chapter}"
+    return f"{book}.{start_chapter}-{end_chapter}"
+
+def span_covers(span: Span, ref: str) -> bool:
+    """Whether span holds every chapter ref falls in"""
+    book, start_chapter, end_chapter = chapter_span(ref)
+    span_book, span_start, span_end = span
+    return book == span_book and span_start <= start_chapter and end_chapter <= span_end
+
+def slice_response(data: Dict[str, Any], span: Span, ref: str) -> Optional[Dict[str, Any]]:
+    """The /texts response for ref, cut out of the response for span.
+    
+    Like a response for ref itself, it holds ref's whole chapters; the
+    client trims them to ref's verses as usual. None if span doesn't
+    cover ref or the response is missing some of its chapters.
+    """
+    if not span_covers(span, ref):
+        return None
+    _, start_chapter, end_chapter = chapter_span(ref)
+    span_start = span[1]
+    
+    text = data.get('text', [])
+    if text and not isinstance(text[0], list):
+        text = [text]  # Single chapter spans come back flat
+    chapters = text[start_chapter - span_start:end_chapter - span_start + 1]
+    if len(chapters) != end_chapter - start_chapter + 1:
+        return None
+    
+    # Hebrew isn't used downstream, so like the corpus it isn't carried over
+    sliced = {'text': chapters, 'he': []}
+    for key in ('versionTitle', 'versionSource'):
+        if key in data:
+            sliced[key] = data[key]
+    return sliced
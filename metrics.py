@@ -0,0 +1,136 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; feed stages range from sub-millisecond renders to multi-second upstream calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels: str) -> float:
+        """Current count for labels, 0 if never incremented"""
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a dict lookup and a bisect"""
+    
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Gauge:
+    """Value read from func when metrics are scraped, e.g. a cache's size"""
+    
+    def __init__(self, name: str, help: str, func: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.func = func
+    
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.func():g}"]
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+    
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "torah_feed_stage_seconds", "Time spent in each stage of a feed rebuild",
+    ["stage", "kind", "location"]))
+CACHE_READ_SECONDS = REGISTRY.register(Histogram(
+    "torah_cache_read_seconds", "Time to read a feed from the cache when serving it, by the tier that answered",
+    ["tier", "kind", "location"]))
+BUILD_SECONDS = REGISTRY.register(Histogram(
+    "torah_feed_build_seconds", "Time to rebuild and cache a whole feed", ["kind", "location"]))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "torah_feed_cache_requests_total",
+    "Feed requests by cache outcome: hit, stale (served while rebuilding), miss, or coalesced (waited for a rebuild in flight)",
+    ["result", "kind", "location"]))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "torah_upstream_request_seconds", "Latency of each upstream API attempt", ["upstream", "status"]))
+UPSTREAM_REQUESTS = REGISTRY.register(Counter(
+    "torah_upstream_requests_total", "Upstream API attempts by status, including ones the circuit breaker refused",
+    ["upstream", "status"]))
+
+def location_label(location: str) -> str:
+    """Location as a label value; any location is routable, but series must stay bounded"""
+    return location if location in ("diaspora", "israel") else "other"
+
+def upstream_status(error: Optional[BaseException]) -> str:
+    """Status label for an upstream attempt that raised error, or succeeded if None"""
+    if error is None:
+        return "200"
+    status = getattr(error, 'status', None)
+    if status:
+        return str(status)
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+def observe_upstream(upstream: str, started: float, error: Optional[BaseException] = None) -> None:
+    status = upstream_status(error)
+    UPSTREAM_REQUESTS.inc(upstream=upstream, status=status)
+    UPSTREAM_SECONDS.observe(time.perf_counter() - started, upstream=upstream, status=status)
@@ -0,0 +1,177 @@
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, List, Tuple
+
+from parashot import PARASHOT
+
+# Hebrew calendar arithmetic on fixed day numbers (date.toordinal()), following
+# Reingold & Dershowitz, "Calendrical Calculations". Months count from Nisan = 1;
+# the year starts at Tishrei = 7.
+HEBREW_EPOCH = -1373427
+NISAN, SIVAN, AV, TISHREI = 1, 3, 5, 7
+SATURDAY = 6  # fixed day numbers mod 7, Sunday = 0
+
+def is_leap_year(year: int) -> bool:
+    return (7 * year + 1) % 19 < 7
+
+def _elapsed_days(year: int) -> int:
+    months_elapsed = (235 * year - 234) // 19
+    parts_elapsed = 12084 + 13753 * months_elapsed
+    days = 29 * months_elapsed + parts_elapsed // 25920
+    # Rosh Hashana can't fall on Sunday, Wednesday or Friday
+    if (3 * (days + 1)) % 7 < 3:
+        days += 1
+    return days
+
+def _year_length_correction(year: int) -> int:
+    ny0, ny1, ny2 = _elapsed_days(year - 1), _elapsed_days(year), _elapsed_days(year + 1)
+    if ny2 - ny1 == 356:
+        return 2
+    if ny1 - ny0 == 382:
+        return 1
+    return 0
+
+def new_year(year: int) -> int:
+    """Fixed day number of 1 Tishrei"""
+    return HEBREW_EPOCH + _elapsed_days(year) + _year_length_correction(year)
+
+def _days_in_year(year: int) -> int:
+    return new_year(year + 1) - new_year(year)
+
+def _days_in_month(month: int, year: int) -> int:
+    days_in_year = _days_in_year(year)
+    if month in (2, 4, 6, 10, 13):
+        return 29
+    if month == 12 and not is_leap_year(year):
+        return 29
+    if month == 8 and days_in_year % 10 != 5:  # Cheshvan is long in complete years
+        return 29
+    if month == 9 and days_in_year % 10 == 3:  # Kislev is short in deficient years
+        return 29
+    return 30
+
+def fixed_from_hebrew(year: int, month: int, day: int) -> int:
+    result = new_year(year) + day - 1
+    last_month = 13 if is_leap_year(year) else 12
+    if month < TISHREI:
+        result += sum(_days_in_month(m, year) for m in range(TISHREI, last_month + 1))
+        result += sum(_days_in_month(m, year) for m in range(NISAN, month))
+    else:
+        result += sum(_days_in_month(m, year) for m in range(TISHREI, month))
+    return result
+
+def _shabbat_on_or_before(fixed: int) -> int:
+    return fixed - (fixed - SATURDAY) % 7
+
+def _shabbat_after(fixed: int) -> int:
+    return _shabbat_on_or_before(fixed) + 7
+
+def _holidays(year: int, israel: bool) -> set:
+    """Fixed days in Hebrew year whose own Torah reading displaces the weekly parasha"""
+    days = [(TISHREI, 1), (TISHREI, 2), (TISHREI, 10)]
+    days += [(TISHREI, d) for d in range(15, 23 if israel else 24)]  # Sukkot to Simchat Torah
+    days += [(NISAN, d) for d in range(15, 22 if israel else 23)]    # Pesach
+    days += [(SIVAN, d) for d in range(6, 7 if israel else 8)]       # Shavuot
+    return {fixed_from_hebrew(year, month, day) for month, day in days}
+
+def _group(parashot: List[str], doubles: List[str], slots: int) -> List[List[str]]:
+    """Group parashot for the given number of Shabbatot, combining doubles in priority order"""
+    combine = set(doubles[:max(0, len(parashot) - slots)])
+    groups = []
+    i = 0
+    while i < len(parashot):
+        if parashot[i] in combine and i + 1 < len(parashot):
+            groups.append(parashot[i:i + 2])
+            i += 2
+        else:
+            groups.append([parashot[i]])
+            i += 1
+    return groups
+
+def cycle_readings(year: int, israel: bool) -> List[Tuple[int, List[str]]]:
+    """(fixed day, parashot) for every Shabbat from Bereishit in Hebrew year `year`
+    up to the Shabbat before the next Bereishit.
+    
+    The cycle is split at fixed points: Tzav before Pesach (regular years),
+    Bamidbar before Shavuot, Devarim on the Shabbat before Tisha B'Av, and
+    Bereishit after Simchat Torah. Within each segment the double parashot
+    are combined, in order, until the parashot fit the Shabbatot available.
+    Leftover Shabbatot carry into the next segment, which is how Israel gets
+    a week ahead when the eighth day of Pesach falls on Shabbat.
+    """
+    holidays = _holidays(year, israel) | _holidays(year + 1, israel)
+    simchat_torah = 22 if israel else 23
+    start = _shabbat_after(fixed_from_hebrew(year, TISHREI, simchat_torah))
+    end = _shabbat_after(fixed_from_hebrew(year + 1, TISHREI, simchat_torah))
+    
+    pesach = fixed_from_hebrew(year, NISAN, 15)
+    bamidbar = _shabbat_on_or_before(fixed_from_hebrew(year, SIVAN, 5))
+    devarim = _shabbat_on_or_before(fixed_from_hebrew(year, AV, 9))
+    
+    index = {name: i for i, name in enumerate(PARASHOT)}
+    segments = []
+    if is_leap_year(year):
+        segments.append((PARASHOT[:index["Bamidbar"]], bamidbar, ["Vayakhel", "Tazria", "Achrei Mot", "Behar"]))
+    else:
+        segments.append((PARASHOT[:index["Shmini"]], pesach, ["Vayakhel"]))
+        segments.append((PARASHOT[index["Shmini"]:index["Bamidbar"]], bamidbar, ["Tazria", "Achrei Mot", "Behar"]))
+    segments.append((PARASHOT[index["Bamidbar"]:index["Devarim"]], devarim, ["Matot", "Chukat"]))
+    # V'Zot HaBerachah is read on Simchat Torah, never on a Shabbat
+    segments.append((PARASHOT[index["Devarim"]:index["V'Zot HaBerachah"]], end, ["Nitzavim"]))
+    
+    readings = []
+    slots: List[int] = []
+    carried: List[str] = []
+    shabbat = start
+    for parashot, segment_end, doubles in segments:
+        while shabbat < segment_end:
+            if shabbat not in holidays:
+                slots.append(shabbat)
+            shabbat += 7
+        
+        parashot = carried + parashot
+        groups = _group(parashot, doubles, len(slots))
+        used = min(len(groups), len(slots))
+        readings.extend(zip(slots[:used], groups[:used]))
+        slots = slots[used:]
+        carried = [name for group in groups[used:] for name in group]
+    
+    return readings
+
+class ParashaSchedule:
+    """Date-indexed weekly readings for diaspora and Israel, computed locally"""
+    
+    def __init__(self, years_ahead: int = 10):
+        self.years_ahead = years_ahead
+        self._first_year = None
+        self._last_year = None
+        self._dates: Dict[bool, List[int]] = {True: [], False: []}
+        self._readings: Dict[bool, List[List[str]]] = {True: [], False: []}
+    
+    def _ensure(self, day: date) -> None:
+        # Hebrew year day.year + 3760 begins in the autumn before day, so its
+        # predecessor's cycle is the earliest one that can contain day
+        year = day.year + 3760
+        if self._first_year is not None and self._first_year < year and year + 1 < self._last_year:
+            return
+        
+        self._first_year = year - 1
+        self._last_year = year + self.years_ahead
+        for israel in (True, False):
+            readings = []
+            for cycle_year in range(self._first_year, self._last_year + 1):
+                readings.extend(cycle_readings(cycle_year, israel))
+            self._dates[israel] = [fixed for fixed, _ in readings]
+            self._readings[israel] = [names for _, names in readings]
+    
+    def upcoming(self, location: str, start: date, count: int) -> List[Tuple[date, List[str]]]:
+        """The next count (Shabbat date, parashot) readings on or after start"""
+        israel = location == "israel"
+        self._ensure(start)
+        dates = self._dates[israel]
+        i = bisect_left(dates, start.toordinal())
+        if i + count > len(dates):
+            self.years_ahead += 1 + count // 50
+            self._first_year = None
+            return self.upcoming(location, start, count)
+        return [(date.fromordinal(dates[j]), self._readings[israel][j]) for j in range(i, i + count)]
@@ -0,0 +1,105 @@
+import re
+from typing import Tuple
+
+# Map Torah portions to their Torah book references
+TORAH_PORTION_MAP = {
+    "Bereishit": "Genesis.1.1-6.8",
+    "Noach": "Genesis.6.9-11.32",
+    "Lech-Lecha": "Genesis.12.1-17.27",
+    "Vayera": "Genesis.18.1-22.24",
+    "Chayei Sara": "Genesis.23.1-25.18",
+    "Toldot": "Genesis.25.19-28.9",
+    "Vayetzei": "Genesis.28.10-32.3",
+    "Vayishlach": "Genesis.32.4-36.43",
+    "Vayeshev": "Genesis.37.1-40.23",
+    "Miketz": "Genesis.41.1-44.17",
+    "Vayigash": "Genesis.44.18-47.27",
+    "Vayechi": "Genesis.47.28-50.26",
+    "Shemot": "Exodus.1.1-6.1",
+    "Vaera": "Exodus.6.2-9.35",
+    "Bo": "Exodus.10.1-13.16",
+    "Beshalach": "Exodus.13.17-17.16",
+    "Yitro": "Exodus.18.1-20.23",
+    "Mishpatim": "Exodus.21.1-24.18",
+    "Terumah": "Exodus.25.1-27.19",
+    "Tetzaveh": "Exodus.27.20-30.10",
+    "Ki Tisa": "Exodus.30.11-34.35",
+    "Vayakhel": "Exodus.35.1-38.20",
+    "Pekudei": "Exodus.38.21-40.38",
+    "Vayikra": "Leviticus.1.1-5.26",
+    "Tzav": "Leviticus.6.1-8.36",
+    "Shmini": "Leviticus.9.1-11.47",
+    "Tazria": "Leviticus.12.1-13.59",
+    "Metzora": "Leviticus.14.1-15.33",
+    "Achrei Mot": "Leviticus.16.1-18.30",
+    "Kedoshim": "Leviticus.19.1-20.27",
+    "Emor": "Leviticus.21.1-24.23",
+    "Behar": "Leviticus.25.1-26.2",
+    "Bechukotai": "Leviticus.26.3-27.34",
+    "Bamidbar": "Numbers.1.1-4.20",
+    "Nasso": "Numbers.4.21-7.89",
+    "Beha'alotcha": "Numbers.8.1-12.16",
+    "Sh'lach": "Numbers.13.1-15.41",
+    "Korach": "Numbers.16.1-18.32",
+    "Chukat": "Numbers.19.1-22.1",
+    "Balak": "Numbers.22.2-25.9",
+    "Pinchas": "Numbers.25.10-30.1",
+    "Matot": "Numbers.30.2-32.42",
+    "Masei": "Numbers.33.1-36.13",
+    "Devarim": "Deuteronomy.1.1-3.22",
+    "Vaetchanan": "Deuteronomy.3.23-7.11",
+    "Eikev": "Deuteronomy.7.12-11.25",
+    "Re'eh": "Deuteronomy.11.26-16.17",
+    "Shoftim": "Deuteronomy.16.18-21.9",
+    "Ki Teitzei": "Deuteronomy.21.10-25.19",
+    "Ki Tavo": "Deuteronomy.26.1-29.8",
+    "Nitzavim": "Deuteronomy.29.9-30.20",
+    "Vayeilech": "Deuteronomy.31.1-31.30",
+    "Ha'Azinu": "Deuteronomy.32.1-32.52",
+    "V'Zot HaBerachah": "Deuteronomy.33.1-34.12"
+}
+# Every parasha in reading order
+PARASHOT = list(TORAH_PORTION_MAP)
+
+# Pairs that are read together on one Shabbat in years with too few Shabbatot,
+# keyed by the first of the pair
+DOUBLE_PARASHOT = {
+    "Vayakhel": "Pekudei",
+    "Tazria": "Metzora",
+    "Achrei Mot": "Kedoshim",
+    "Behar": "Bechukotai",
+    "Chukat": "Balak",
+    "Matot": "Masei",
+    "Nitzavim": "Vayeilech",
+}
+
+def combined_name(names) -> str:
+    """Name for one or more parashot read on the same Shabbat, e.g. Vayakhel-Pekudei"""
+    return "-".join(names)
+
+_REF_PATTERN = re.compile(r'^(?P<book>[A-Za-z ]+)\.(?P<sc>\d+)\.(?P<sv>\d+)-(?P<ec>\d+)\.(?P<ev>\d+)$')
+
+def combined_ref(first_ref: str, last_ref: str) -> str:
+    """Ref spanning from the start of first_ref to the end of last_ref (same book)"""
+    book, start_chapter, start_verse, _, _ = parse_ref(first_ref)
+    _, _, _, end_chapter, end_verse = parse_ref(last_ref)
+    return f"{book}.{start_chapter}.{start_verse}-{end_chapter}.{end_verse}"
+
+def parse_ref(ref: str) -> Tuple[str, int, int, int, int]:
+    """Split a ref like "Genesis.6.9-11.32" into (book, start chapter, start verse, end chapter, end verse)"""
+    match = _REF_PATTERN.match(ref)
+    if not match:
+        raise ValueError(f"Unsupported reference: {ref}")
+    return (match['book'], int(match['sc']), int(match['sv']), int(match['ec']), int(match['ev']))
+
+def refs_overlap(first: str, second: str) -> bool:
+    """Whether two refs like "Genesis.6.9-11.32" share any verse"""
+    book, start_chapter, start_verse, end_chapter, end_verse = parse_ref(first)
+    other_book, other_start_chapter, other_start_verse, other_end_chapter, other_end_verse = parse_ref(second)
+    return (book == other_book
+            and (start_chapter, start_verse) <= (other_end_chapter, other_end_verse)
+            and (other_start_chapter, other_start_verse) <= (end_chapter, end_verse))
+
+# Double parashot are looked up by their combined name like any other portion
+for _first, _second in DOUBLE_PARASHOT.items():
+    TORAH_PORTION_MAP[combined_name([_first, _second])] = combined_ref(TORAH_PORTION_MAP[_first], TORAH_PORTION_MAP[_second])
@@ -0,0 +1,67 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+# Profilers are process-wide, so only one profiled run at a time
+_profile_lock = asyncio.Lock()
+
+async def profile(func: Callable[[], Awaitable[Any]], title: str, top_n: int = 30,
+                  store_dir: Optional[str] = None) -> str:
+    """Await func() under cProfile and tracemalloc and return a plain-text report.
+    
+    The report lists the top_n functions by cumulative time and the top_n
+    source lines by memory allocated during the run. cProfile sees the whole
+    thread, so anything else the event loop runs meanwhile is included too.
+    With store_dir the raw profile is also saved there for pstats/snakeviz.
+    """
+    async with _profile_lock:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        error = None
+        
+        profiler.enable()
+        try:
+            await func()
+        except Exception as e:
+            error = e
+        finally:
+            profiler.disable()
+        
+        elapsed = time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+    
+    out = io.StringIO()
+    out.write(f"Profile of {title}: {elapsed * 1000:.1f} ms wall, peak traced memory {peak / 1024:.0f} KiB\n")
+    if error:
+        out.write(f"Run failed: {error!r}\n")
+    
+    if store_dir:
+        os.makedirs(store_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(store_dir, f"{title.replace('/', '_')}-{stamp}.prof")
+        profiler.dump_stats(path)
+        out.write(f"Saved profile to {path}\n")
+    
+    out.write(f"\nTop {top_n} functions by cumulative time\n\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top_n)
+    
+    out.write(f"Top {top_n} allocation sites\n\n")
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    for stat in diff[:top_n]:
+        out.write(f"{stat}\n")
+    return out.getvalue()
@@ -0,0 +1,128 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from daily_division import number_verses
+
+# (chapter, verse) numbered verse text, as produced by daily_division.number_verses
+NumberedVerses = List[Tuple[Tuple[Optional[int], int], str]]
+
+BANNER_OPEN = "<div style='background: #f0f8ff; padding: 20px; margin-bottom: 20px; border-left: 5px solid #4a90e2;'>\n"
+WEEKLY_BANNER = (BANNER_OPEN +
+                 "<h2 style='color: #2c5aa0; margin-top: 0;'>📅 Shabbat {weekday}, {date}</h2>\n"
+                 "<h3 style='color: #2c5aa0; margin-bottom: 0;'>Parashat {parasha}</h3>\n"
+                 "</div>\n")
+DAILY_BANNER = (BANNER_OPEN +
+                "<h2 style='color: #2c5aa0; margin-top: 0;'>📅 Daily Torah Study - {weekday}, {date}</h2>\n"
+                "<h3 style='color: #2c5aa0; margin-bottom: 10px;'>{day_name} - Parashat {parasha} (Day {day} of 7)</h3>\n"
+                "<p style='color: #666; margin-bottom: 0;'><strong>Shabbat Torah Portion:</strong> {parasha_date}</p>\n"
+                "</div>\n")
+FIELD = "<p><strong>{label}:</strong> {value}</p>\n"
+SOURCE = "<p><strong>Source:</strong> <a href=\"{source}\">{source}</a></p>\n"
+CHAPTER = "<h3>Chapter {chapter}</h3>\n"
+VERSE = "<p><sup>{verse}</sup> {text}</p>\n"
+
+class ContentRenderer:
+    """Renders portion HTML from per-verse fragments.
+    
+    Each verse is rendered once and cached by (book, chapter, verse), so the
+    weekly and daily feeds and every rebuild reuse the same fragments. A
+    fragment is only reused for the text it was rendered from, so another
+    version or a corrected text replaces it; the whole Torah is under 6,000
+    verses, so the cache needs no bound.
+    """
+    
+    def __init__(self):
+        self._fragments: Dict[Tuple[str, int, int], Tuple[str, str]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def clear(self) -> None:
+        self._fragments.clear()
+    
+    def _verses(self, book: Optional[str], numbered: NumberedVerses) -> List[str]:
+        parts = []
+        current_chapter = None
+        for (chapter, verse), text in numbered:
+            if chapter is not None and chapter != current_chapter:
+                parts.append(CHAPTER.format(chapter=chapter))
+                current_chapter = chapter
+            
+            # Only exactly numbered verses are cached; a guessed number could
+            # attach this text to the wrong verse for every later feed
+            if book is None:
+                parts.append(VERSE.format(verse=verse, text=text))
+                continue
+            key = (book, chapter, verse)
+            cached = self._fragments.get(key)
+            if cached is None or cached[0] != text:
+                self.misses += 1
+                fragment = VERSE.format(verse=verse, text=text)
+                self._fragments[key] = (text, fragment)
+            else:
+                self.hits += 1
+                fragment = cached[1]
+            parts.append(fragment)
+        return parts
+    
+    def _page(self, header: List[str], div_class: str, book: Optional[str], numbered: NumberedVerses) -> str:
+        parts = header
+        parts.append(f"<div class='{div_class}'>\n")
+        parts.extend(self._verses(book, numbered))
+        parts.append("</div>\n")
+        return "".join(parts)
+    
+    def _weekly_verses(self, torah_text: Dict[str, Any]) -> Tuple[Optional[str], NumberedVerses]:
+        text = torah_text.get('text', [])
+        if text and not isinstance(text[0], list):
+            text = [text]
+        
+        ref = torah_text.get('ref')
+        if ref:
+            return ref.split('.', 1)[0], number_verses(text, ref)
+        
+        # Without the API ref, take the starting chapter from the display
+        # reference (e.g. "Deuteronomy 11 26-16 17") and number from 1
+        starting_chapter = 1
+        try:
+            starting_chapter = int(torah_text.get('reference', '').split()[1])
+        except (ValueError, IndexError):
+            pass
+        return None, [((starting_chapter + c, v), verse)
+                      for c, chapter in enumerate(text) for v, verse in enumerate(chapter, 1)]
+    
+    def weekly(self, torah_text: Dict[str, Any], parasha_date: Optional[date] = None) -> str:
+        """HTML for a weekly portion, with a date banner when parasha_date is given"""
+        if parasha_date:
+            header = [WEEKLY_BANNER.format(weekday=parasha_date.strftime('%A'),
+                                           date=parasha_date.strftime('%B %d, %Y'),
+                                           parasha=torah_text['parasha']),
+                      FIELD.format(label="Torah Reference", value=torah_text.get('reference', ''))]
+        else:
+            header = [f"<h2>Parashat {torah_text['parasha']}</h2>\n",
+                      FIELD.format(label="Reference", value=torah_text.get('reference', ''))]
+        header.append(FIELD.format(label="Translation", value=torah_text.get('version', 'JPS')))
+        if torah_text.get('source'):
+            header.append(SOURCE.format(source=torah_text['source']))
+        
+        book, numbered = self._weekly_verses(torah_text)
+        return self._page(header, 'torah-text', book, numbered)
+    
+    def daily(self, portion: Dict[str, Any], portion_date: Optional[date] = None,
+              parasha_date: Optional[date] = None) -> str:
+        """HTML for one daily portion, with a date banner when portion_date is given"""
+        if portion_date:
+            header = [DAILY_BANNER.format(weekday=portion_date.strftime('%A'),
+                                          date=portion_date.strftime('%B %d, %Y'),
+                                          day_name=portion['day_name'], parasha=portion['parasha'],
+                                          day=portion['day'], parasha_date=parasha_date.strftime('%B %d, %Y')),
+                      FIELD.format(label="Torah Reference", value=portion['verse_range']),
+                      FIELD.format(label="Translation", value="JPS Contemporary Torah")]
+        else:
+            header = [f"<h2>{portion['day_name']} Study - Parashat {portion['parasha']}</h2>\n",
+                      f"<p><strong>Day {portion['day']} of 7</strong> | {portion['verse_range']}</p>\n"]
+        
+        if portion.get('verses'):
+            return self._page(header, 'daily-torah-text', portion.get('book'), portion['verses'])
+        # Unnumbered text: label verses by position within the day
+        numbered = [((None, v), verse) for v, verse in enumerate(portion['text'], 1)]
+        return self._page(header, 'daily-torah-text', None, numbered)
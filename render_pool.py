@@ -0,0 +1,44 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+POOL_MODES = ("none", "thread", "process")
+
+class RenderPool:
+    """Runs CPU-bound rendering off the event loop.
+    
+    mode is "none" (run inline on the loop), "thread" or "process". With
+    processes, func and its arguments must be picklable: module-level
+    functions and plain data, not objects holding caches or sessions.
+    """
+    
+    def __init__(self, mode: str = "none", workers: Optional[int] = None):
+        if mode not in POOL_MODES:
+            raise ValueError(f"Unknown render pool {mode!r}; expected one of {', '.join(POOL_MODES)}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+    
+    @property
+    def processes(self) -> bool:
+        return self.mode == "process"
+    
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app doesn't start workers
+        if self._executor is None:
+            if self.processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        return self._executor
+    
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.mode == "none":
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+    
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,118 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+from metrics import UPSTREAM_REQUESTS, observe_upstream
+
+# Statuses worth retrying; anything else means the request itself is wrong
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+
+class UpstreamError(Exception):
+    """An unsuccessful upstream response; transient unless status says otherwise"""
+    
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is known to be down"""
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, (aiohttp.ClientResponseError, UpstreamError)) and error.status is not None:
+        return error.status in TRANSIENT_STATUSES
+    return isinstance(error, (UpstreamError, aiohttp.ClientError, asyncio.TimeoutError))
+
+class CircuitBreaker:
+    """Stops calls to an upstream after repeated failures.
+    
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast. Once reset_timeout has passed a single trial call is let
+    through; its success closes the circuit, its failure reopens it.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_started: Optional[float] = None
+    
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+    
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            return False
+        # A trial that never reported back (e.g. was cancelled) doesn't block forever
+        if self.trial_started is not None and now - self.trial_started < self.reset_timeout:
+            return False
+        self.trial_started = now
+        return True
+    
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started = None
+    
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_started is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.trial_started = None
+
+class Upstream:
+    """Retry, circuit breaking and last-known-good fallback for one upstream API"""
+    
+    def __init__(self, name: str, attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0,
+                 breaker: Optional[CircuitBreaker] = None, keep_last_good: bool = True):
+        self.name = name
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.keep_last_good = keep_last_good
+        self.last_good: Dict[str, Any] = {}
+    
+    async def call(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Call func, retrying transient failures with jittered exponential backoff.
+        
+        If every attempt fails, or the circuit is open, the last successful
+        result for key is returned instead; with none the error is raised.
+        """
+        last_error: Exception = CircuitOpenError(f"{self.name} circuit is open")
+        for attempt in range(self.attempts):
+            if not self.breaker.allow():
+                UPSTREAM_REQUESTS.inc(upstream=self.name, status="circuit_open")
+                last_error = CircuitOpenError(f"{self.name} circuit is open")
+                break
+            started = time.perf_counter()
+            try:
+                result = await func()
+            except Exception as e:
+                observe_upstream(self.name, started, e)
+                if not is_transient(e):
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+                if attempt + 1 < self.attempts:
+                    # Full jitter keeps concurrent retries from arriving in lockstep
+                    await asyncio.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                continue
+            
+            observe_upstream(self.name, started)
+            self.breaker.record_success()
+            if self.keep_last_good and result is not None:
+                self.last_good[key] = result
+            return result
+        
+        if key in self.last_good:
+            print(f"{self.name} unavailable ({last_error!r}), using last good response for {key}")
+            return self.last_good[key]
+        raise last_error
@@ -1,334 +1,460 @@
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Any
-import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, AsyncIterator, Callable, Awaitable, Iterator, Optional, Tuple
+import asyncio
+import copy
+import time
+
+from cache import ItemCache
+from metrics import STAGE_SECONDS, location_label
+from render import ContentRenderer
+from render_pool import RenderPool
+from rss_writer import RSSWriter, Fields
+
+# Generators used by render pool processes, one per (base_url, pretty)
+_worker_generators: Dict[Tuple[str, bool], "RSSGenerator"] = {}
+
+def _render_in_worker(base_url: str, pretty: bool, text_generation: Any, method: str, *args: Any) -> Any:
+    """Pool process entry point: call method on this process's own generator.
+    
+    Its verse fragments are dropped whenever the parent's text generation changes.
+    """
+    generator = _worker_generators.get((base_url, pretty))
+    if generator is None:
+        generator = _worker_generators[(base_url, pretty)] = RSSGenerator(pretty=pretty, item_cache_size=0)
+        generator.base_url = base_url
+    if generator.text_generation != text_generation:
+        generator.clear_caches()
+        generator.text_generation = text_generation
+    return getattr(generator, method)(*args)
 
 class RSSGenerator:
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 4, pretty: bool = True, item_cache_size: int = 256,
+                 pool: Optional[RenderPool] = None):
         self.base_url = "https://torah-rss-feed-production.up.railway.app"
+        self.writer = RSSWriter(pretty=pretty)
+        self.renderer = ContentRenderer()
+        # Serialized upcoming-feed items, reused across rebuilds
+        self.items = ItemCache(item_cache_size)
+        # Maximum number of Sefaria requests in flight per feed build
+        self.max_concurrency = max(1, max_concurrency)
+        # Where upcoming-feed items are rendered; inline on the event loop by default
+        self.pool = pool or RenderPool()
+        # Text generation of the Sefaria client the cached items were rendered from
+        self.text_generation = None
+    
+    def clear_caches(self) -> None:
+        """Forget every rendered item and verse fragment, e.g. after texts were corrected"""
+        self.items.clear()
+        self.renderer.clear()
+    
+    def _check_texts(self, sefaria_client) -> None:
+        """Clear the caches if sefaria_client's texts were invalidated since they were filled"""
+        generation = sefaria_client.text_generation()
+        if generation != self.text_generation:
+            self.clear_caches()
+            self.text_generation = generation
+    
+    def with_pool(self, pool: RenderPool) -> "RSSGenerator":
+        """This generator, sharing its caches, but rendering in pool"""
+        generator = copy.copy(self)
+        generator.pool = pool
+        return generator
+    
+    def _start_fetches(self, fetch: Callable[[Dict[str, Any]], Awaitable[Any]],
+                       parashot: List[Dict[str, Any]], labels: Optional[Dict[str, str]] = None,
+                       prerequisites: Optional[List[List[asyncio.Task]]] = None) -> List[asyncio.Task]:
+        """Start fetch for every parasha with bounded concurrency, one task per parasha.
+        
+        A fetch that raises resolves to None so one bad portion can't drop
+        the whole feed. With labels, each fetch is timed as the "fetch" stage.
+        prerequisites, in the same order as parashot, are tasks each fetch
+        waits for before it starts.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(parasha, waits):
+            if waits:
+                await asyncio.wait(waits)
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    return await fetch(parasha)
+                except Exception as e:
+                    print(f"Error fetching {parasha.get('name_english', 'unknown')}: {e}")
+                    return None
+                finally:
+                    if labels:
+                        STAGE_SECONDS.observe(time.perf_counter() - started, stage="fetch", **labels)
+        
+        prerequisites = prerequisites or [[] for _ in parashot]
+        return [asyncio.ensure_future(run(parasha, waits)) for parasha, waits in zip(parashot, prerequisites)]
+    
+    def _start_prefetch(self, sefaria_client, parashot: List[Dict[str, Any]], daily: bool,
+                        labels: Optional[Dict[str, str]] = None) -> List[List[asyncio.Task]]:
+        """Start the merged Sefaria requests for all the text parashot need.
+        
+        Returns, for each parasha, the requests its own text comes from, so
+        it can be fetched and rendered as soon as those land. With labels,
+        each request is timed as the "prefetch" stage.
+        """
+        try:
+            refs = [sefaria_client.portion_refs(parasha, daily) for parasha in parashot]
+            tasks = sefaria_client.start_prefetch(ref for parasha_refs in refs for ref in parasha_refs)
+        except Exception as e:
+            # The per-parasha fetches still get whatever is missing
+            print(f"Error prefetching texts: {e}")
+            return [[] for _ in parashot]
+        
+        started = time.perf_counter()
+        
+        def observe(task):
+            if not task.cancelled():
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="prefetch", **labels)
+        
+        if labels:
+            for task in set(tasks.values()):
+                task.add_done_callback(observe)
+        return [list({tasks[ref] for ref in parasha_refs if ref in tasks}) for parasha_refs in refs]
+    
+    async def fetch_upcoming(self, sefaria_client, parashot: List[Dict[str, Any]],
+                             daily: bool = False) -> List[Optional[Any]]:
+        """Fetch every parasha's text as the upcoming feeds do, preserving order.
+        
+        Each result is what get_torah_portion, or with daily get_daily_portions,
+        returned for that parasha, or None if it failed.
+        """
+        fetch = sefaria_client.get_daily_portions if daily else sefaria_client.get_torah_portion
+        prefetches = self._start_prefetch(sefaria_client, parashot, daily)
+        return await asyncio.gather(*self._start_fetches(fetch, parashot, prerequisites=prefetches))
+    
+    def _channel(self, title: str, description: str, link: str) -> Fields:
+        """Channel metadata fields"""
+        return [
+            ("title", title),
+            ("description", description),
+            ("link", link),
+            ("language", "en-us"),
+            ("lastBuildDate", datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")),
+        ]
     
     def generate_weekly_feed(self, parasha: Dict[str, Any], torah_text: Dict[str, Any], location: str) -> str:
         """Generate RSS feed for weekly Torah portions"""
         
-        rss = ET.Element("rss", version="2.0")
-        rss.set("xmlns:content", "http://purl.org/rss/1.0/modules/content/")
-        
-        channel = ET.SubElement(rss, "channel")
-        
         # Channel metadata
-        ET.SubElement(channel, "title").text = f"Weekly Torah Portions - JPS Translation ({location.title()})"
-        ET.SubElement(channel, "description").text = "Complete weekly Torah portions with full JPS English text"
-        ET.SubElement(channel, "link").text = f"{self.base_url}/feeds/weekly/{location}"
-        ET.SubElement(channel, "language").text = "en-us"
-        ET.SubElement(channel, "lastBuildDate").text = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")
+        channel = self._channel(
+            f"Weekly Torah Portions - JPS Translation ({location.title()})",
+            "Complete weekly Torah portions with full JPS English text",
+            f"{self.base_url}/feeds/weekly/{location}"
+        )
         
+        items = []
         if torah_text:
             # Create item for current Torah portion
-            item = ET.SubElement(channel, "item")
-            
             title = f"Parashat {parasha['name_english']}"
-            ET.SubElement(item, "title").text = title
-            ET.SubElement(item, "link").text = f"{self.base_url}/portion/{parasha['name_english']}"
-            ET.SubElement(item, "guid").text = f"{parasha['name_english']}-{parasha['date']}"
-            ET.SubElement(item, "pubDate").text = parasha['date'].strftime("%a, %d %b %Y 00:00:00 %z")
             
             # Description with summary
             description = f"Torah Portion: {title}\nReference: {torah_text.get('reference', '')}\n"
             description += f"Translation: {torah_text.get('version', 'JPS')}"
-            ET.SubElement(item, "description").text = description
             
             # Full content
-            content = self._format_torah_content(torah_text)
-            content_elem = ET.SubElement(item, "content:encoded")
-            content_elem.text = f"<![CDATA[{content}]]>"
-        
-        return self._prettify_xml(rss)
+            content = self.renderer.weekly(torah_text)
+            
+            items.append([
+                ("title", title),
+                ("link", f"{self.base_url}/portion/{parasha['name_english']}"),
+                ("guid", f"{parasha['name_english']}-{parasha['date']}"),
+                ("pubDate", parasha['date'].strftime("%a, %d %b %Y 00:00:00 %z")),
+                ("description", description),
+                ("content:encoded", f"<![CDATA[{content}]]>"),
+            ])
+        
+        return "".join(self.writer.write(channel, items))
     
     def generate_daily_feed(self, daily_portions: List[Dict[str, Any]], location: str) -> str:
         """Generate RSS feed for daily Torah portions"""
         
-        rss = ET.Element("rss", version="2.0")
-        rss.set("xmlns:content", "http://purl.org/rss/1.0/modules/content/")
-        
-        channel = ET.SubElement(rss, "channel")
-        
         # Channel metadata
-        ET.SubElement(channel, "title").text = f"Daily Torah Portions - JPS Translation ({location.title()})"
-        ET.SubElement(channel, "description").text = "Daily Torah study portions with full JPS English text"
-        ET.SubElement(channel, "link").text = f"{self.base_url}/feeds/daily/{location}"
-        ET.SubElement(channel, "language").text = "en-us"
-        ET.SubElement(channel, "lastBuildDate").text = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")
-        
-        # Create items for each day's portion
-        for portion in daily_portions[-7:]:  # Last 7 days
-            item = ET.SubElement(channel, "item")
+        channel = self._channel(
+            f"Daily Torah Portions - JPS Translation ({location.title()})",
+            "Daily Torah study portions with full JPS English text",
+            f"{self.base_url}/feeds/daily/{location}"
+        )
+        
+        def items():
+            # Create items for each day's portion
+            for portion in daily_portions[-7:]:  # Last 7 days
+                title = f"{portion['day_name']} - Parashat {portion['parasha']} (Day {portion['day']})"
+                
+                # Calculate date for this day (assuming Sunday = start of Torah week)
+                base_date = datetime.now().date()
+                days_back = base_date.weekday() + 1  # Monday = 0, so Sunday = 6
+                sunday = base_date - timedelta(days=days_back)
+                portion_date = sunday + timedelta(days=portion['day'] - 1)
+                
+                # Description
+                description = f"Daily Torah study for {portion['day_name']}\n"
+                description += f"Parashat {portion['parasha']} - {portion['verse_range']}"
+                
+                # Full content
+                content = self.renderer.daily(portion)
+                
+                yield [
+                    ("title", title),
+                    ("link", f"{self.base_url}/daily/{portion['parasha']}/{portion['day']}"),
+                    ("guid", f"{portion['parasha']}-day-{portion['day']}"),
+                    ("pubDate", portion_date.strftime("%a, %d %b %Y 06:00:00 %z")),
+                    ("description", description),
+                    ("content:encoded", f"<![CDATA[{content}]]>"),
+                ]
+        
+        return "".join(self.writer.write(channel, items()))
+    
+    def _upcoming_weekly_item(self, parasha: Dict[str, Any], torah_text: Dict[str, Any]) -> Fields:
+        """Item fields for one upcoming weekly Torah portion"""
+        # Make the date prominent in the title
+        date_str = parasha['date'].strftime('%B %d, %Y')
+        weekday = parasha['date'].strftime('%A')
+        title = f"Parashat {parasha['name_english']} - {weekday}, {date_str}"
+        
+        # Use the parasha date for publication
+        pub_date = datetime.combine(parasha['date'], datetime.min.time()).replace(tzinfo=timezone.utc)
+        
+        # Description with prominent date information
+        description = f"📅 SHABBAT DATE: {weekday}, {date_str}\n\n"
+        description += f"Torah Portion: Parashat {parasha['name_english']}\n"
+        description += f"Torah Reference: {torah_text.get('reference', '')}\n"
+        description += f"Translation: {torah_text.get('version', 'JPS Contemporary Torah 2006')}\n\n"
+        description += f"This Torah portion is read on Shabbat, {date_str}."
+        
+        # Full content with date information
+        content = self.renderer.weekly(torah_text, parasha['date'])
+        
+        return [
+            ("title", title),
+            ("link", f"{self.base_url}/portion/{parasha['name_english']}"),
+            ("guid", f"{parasha['name_english']}-{parasha['date']}"),
+            ("pubDate", pub_date.strftime("%a, %d %b %Y 00:00:00 %z")),
+            ("description", description),
+            ("content:encoded", f"<![CDATA[{content}]]>"),
+        ]
+    
+    @staticmethod
+    def _daily_portion_date(parasha_date, day: int):
+        """Date of a daily portion relative to the parasha date"""
+        # Assume Sunday starts the Torah week (day 1 = Sunday)
+        return parasha_date - timedelta(days=(parasha_date.weekday() + 1) % 7) + timedelta(days=day - 1)
+    
+    def _upcoming_daily_items(self, parasha: Dict[str, Any], daily_portions: List[Dict[str, Any]],
+                              two_days_ago) -> Iterator[Tuple[int, Fields]]:
+        """(day, item fields) for each daily portion of a parasha from two_days_ago forward"""
+        for portion in daily_portions:
+            portion_date = self._daily_portion_date(parasha['date'], portion['day'])
             
-            title = f"{portion['day_name']} - Parashat {portion['parasha']} (Day {portion['day']})"
-            ET.SubElement(item, "title").text = title
-            ET.SubElement(item, "link").text = f"{self.base_url}/daily/{portion['parasha']}/{portion['day']}"
-            ET.SubElement(item, "guid").text = f"{portion['parasha']}-day-{portion['day']}"
+            # Only include portions from 2 days ago forward
+            if portion_date < two_days_ago:
+                continue
             
-            # Calculate date for this day (assuming Sunday = start of Torah week)
-            base_date = datetime.now().date()
-            days_back = base_date.weekday() + 1  # Monday = 0, so Sunday = 6
-            sunday = base_date - timedelta(days=days_back)
-            portion_date = sunday + timedelta(days=portion['day'] - 1)
+            # Make the date prominent in the title
+            date_str = portion_date.strftime('%B %d, %Y')
+            weekday = portion_date.strftime('%A')
+            title = f"{portion['day_name']}, {date_str} - Parashat {portion['parasha']} (Day {portion['day']})"
             
-            ET.SubElement(item, "pubDate").text = portion_date.strftime("%a, %d %b %Y 06:00:00 %z")
+            pub_date = datetime.combine(portion_date, datetime.min.time()).replace(tzinfo=timezone.utc)
             
-            # Description
-            description = f"Daily Torah study for {portion['day_name']}\n"
-            description += f"Parashat {portion['parasha']} - {portion['verse_range']}"
-            ET.SubElement(item, "description").text = description
+            # Description with prominent date information
+            description = f"📅 DAILY STUDY DATE: {weekday}, {date_str}\n\n"
+            description += f"Day {portion['day']} of 7 - Daily Torah study for {portion['day_name']}\n"
+            description += f"Parashat {portion['parasha']} - {portion['verse_range']}\n"
+            description += f"Shabbat Torah portion date: {parasha['date'].strftime('%B %d, %Y')}\n\n"
+            description += f"This daily portion is for {weekday}, {date_str}."
             
-            # Full content
-            content = self._format_daily_content(portion)
-            content_elem = ET.SubElement(item, "content:encoded")
-            content_elem.text = f"<![CDATA[{content}]]>"
-        
-        return self._prettify_xml(rss)
-    
-    def _format_torah_content(self, torah_text: Dict[str, Any]) -> str:
-        """Format Torah text as HTML"""
-        html = f"<h2>Parashat {torah_text['parasha']}</h2>\n"
-        html += f"<p><strong>Reference:</strong> {torah_text.get('reference', '')}</p>\n"
-        html += f"<p><strong>Translation:</strong> {torah_text.get('version', 'JPS')}</p>\n"
-        
-        if torah_text.get('source'):
-            html += f"<p><strong>Source:</strong> <a href=\"{torah_text['source']}\">{torah_text['source']}</a></p>\n"
-        
-        html += "<div class='torah-text'>\n"
-        
-        text = torah_text.get('text', [])
-        if text and len(text) > 0 and isinstance(text[0], list):
-            # Handle nested structure (chapters/verses)
-            # Extract starting chapter number from reference (e.g., "Deuteronomy 11 26-16 17" -> 11)
-            reference = torah_text.get('reference', '')
-            starting_chapter = 1
-            try:
-                # Parse reference like "Deuteronomy 11 26-16 17" to get starting chapter
-                parts = reference.split()
-                if len(parts) >= 2:
-                    starting_chapter = int(parts[1])
-            except (ValueError, IndexError):
-                starting_chapter = 1
+            # Full content with date information
+            content = self.renderer.daily(portion, portion_date, parasha['date'])
             
-            for chapter_idx, chapter in enumerate(text):
-                actual_chapter_num = starting_chapter + chapter_idx
-                html += f"<h3>Chapter {actual_chapter_num}</h3>\n"
-                for verse_idx, verse in enumerate(chapter, 1):
-                    html += f"<p><sup>{verse_idx}</sup> {verse}</p>\n"
-        else:
-            # Handle flat verse list
-            for verse_idx, verse in enumerate(text, 1):
-                html += f"<p><sup>{verse_idx}</sup> {verse}</p>\n"
-        
-        html += "</div>\n"
-        return html
+            yield portion['day'], [
+                ("title", title),
+                ("link", f"{self.base_url}/daily/{portion['parasha']}/{portion['day']}"),
+                ("guid", f"{portion['parasha']}-day-{portion['day']}-{parasha['date']}"),
+                ("pubDate", pub_date.strftime("%a, %d %b %Y 06:00:00 %z")),
+                ("description", description),
+                ("content:encoded", f"<![CDATA[{content}]]>"),
+            ]
     
-    def _format_torah_content_with_date(self, torah_text: Dict[str, Any], parasha_date) -> str:
-        """Format Torah text as HTML with prominent date information"""
-        date_str = parasha_date.strftime('%B %d, %Y')
-        weekday = parasha_date.strftime('%A')
-        
-        html = f"<div style='background: #f0f8ff; padding: 20px; margin-bottom: 20px; border-left: 5px solid #4a90e2;'>\n"
-        html += f"<h2 style='color: #2c5aa0; margin-top: 0;'>📅 Shabbat {weekday}, {date_str}</h2>\n"
-        html += f"<h3 style='color: #2c5aa0; margin-bottom: 0;'>Parashat {torah_text['parasha']}</h3>\n"
-        html += "</div>\n"
-        
-        html += f"<p><strong>Torah Reference:</strong> {torah_text.get('reference', '')}</p>\n"
-        html += f"<p><strong>Translation:</strong> {torah_text.get('version', 'JPS')}</p>\n"
-        
-        if torah_text.get('source'):
-            html += f"<p><strong>Source:</strong> <a href=\"{torah_text['source']}\">{torah_text['source']}</a></p>\n"
-        
-        html += "<div class='torah-text'>\n"
-        
-        text = torah_text.get('text', [])
-        if text and len(text) > 0 and isinstance(text[0], list):
-            # Handle nested structure (chapters/verses)
-            # Extract starting chapter number from reference (e.g., "Deuteronomy 11 26-16 17" -> 11)
-            reference = torah_text.get('reference', '')
-            starting_chapter = 1
-            try:
-                # Parse reference like "Deuteronomy 11 26-16 17" to get starting chapter
-                parts = reference.split()
-                if len(parts) >= 2:
-                    starting_chapter = int(parts[1])
-            except (ValueError, IndexError):
-                starting_chapter = 1
-            
-            for chapter_idx, chapter in enumerate(text):
-                actual_chapter_num = starting_chapter + chapter_idx
-                html += f"<h3>Chapter {actual_chapter_num}</h3>\n"
-                for verse_idx, verse in enumerate(chapter, 1):
-                    html += f"<p><sup>{verse_idx}</sup> {verse}</p>\n"
-        else:
-            # Handle flat verse list
-            for verse_idx, verse in enumerate(text, 1):
-                html += f"<p><sup>{verse_idx}</sup> {verse}</p>\n"
-        
-        html += "</div>\n"
-        return html
+    def _render_weekly(self, parasha: Dict[str, Any], torah_text: Dict[str, Any]) -> Tuple[str, float, float]:
+        """Serialized upcoming weekly item, with the seconds spent rendering and serializing it"""
+        started = time.perf_counter()
+        fields = self._upcoming_weekly_item(parasha, torah_text)
+        rendered = time.perf_counter()
+        item = self.writer.item(fields)
+        return item, rendered - started, time.perf_counter() - rendered
     
-    def _format_daily_content(self, portion: Dict[str, Any]) -> str:
-        """Format daily portion as HTML"""
-        html = f"<h2>{portion['day_name']} Study - Parashat {portion['parasha']}</h2>\n"
-        html += f"<p><strong>Day {portion['day']} of 7</strong> | {portion['verse_range']}</p>\n"
-        
-        html += "<div class='daily-torah-text'>\n"
-        for verse_idx, verse in enumerate(portion['text'], 1):
-            html += f"<p><sup>{verse_idx}</sup> {verse}</p>\n"
-        html += "</div>\n"
-        
-        return html
+    def _render_daily(self, parasha: Dict[str, Any], daily_portions: List[Dict[str, Any]],
+                      two_days_ago) -> Tuple[List[Tuple[int, str]], float, float]:
+        """Serialized (day, item) pairs for a parasha's daily portions, with render and serialize seconds.
+        
+        Raises if any day fails, so the parasha is reported as failed rather
+        than cached with days missing.
+        """
+        items = []
+        # Items are rendered lazily between serializations, so render time
+        # is what's left after serializing
+        started = time.perf_counter()
+        serialize = 0.0
+        for day, fields in self._upcoming_daily_items(parasha, daily_portions, two_days_ago):
+            serialize_started = time.perf_counter()
+            items.append((day, self.writer.item(fields)))
+            serialize += time.perf_counter() - serialize_started
+        return items, time.perf_counter() - started - serialize, serialize
     
-    def _format_daily_content_with_date(self, portion: Dict[str, Any], portion_date, parasha_date) -> str:
-        """Format daily portion as HTML with prominent date information"""
-        date_str = portion_date.strftime('%B %d, %Y')
-        weekday = portion_date.strftime('%A')
-        parasha_date_str = parasha_date.strftime('%B %d, %Y')
-        
-        html = f"<div style='background: #f0f8ff; padding: 20px; margin-bottom: 20px; border-left: 5px solid #4a90e2;'>\n"
-        html += f"<h2 style='color: #2c5aa0; margin-top: 0;'>📅 Daily Torah Study - {weekday}, {date_str}</h2>\n"
-        html += f"<h3 style='color: #2c5aa0; margin-bottom: 10px;'>{portion['day_name']} - Parashat {portion['parasha']} (Day {portion['day']} of 7)</h3>\n"
-        html += f"<p style='color: #666; margin-bottom: 0;'><strong>Shabbat Torah Portion:</strong> {parasha_date_str}</p>\n"
-        html += "</div>\n"
-        
-        html += f"<p><strong>Torah Reference:</strong> {portion['verse_range']}</p>\n"
-        html += f"<p><strong>Translation:</strong> JPS Contemporary Torah</p>\n"
-        
-        html += "<div class='daily-torah-text'>\n"
-        for verse_idx, verse in enumerate(portion['text'], 1):
-            html += f"<p><sup>{verse_idx}</sup> {verse}</p>\n"
-        html += "</div>\n"
-        
-        return html
+    async def _render(self, method: str, *args: Any) -> Any:
+        """Call one of the _render_* methods in the render pool.
+        
+        Pool processes can't share this generator, so they get plain
+        arguments and render with a generator of their own.
+        """
+        if self.pool.processes:
+            return await self.pool.run(_render_in_worker, self.base_url, self.writer.pretty, self.text_generation,
+                                       method, *args)
+        return await self.pool.run(getattr(self, method), *args)
     
-    async def generate_upcoming_weekly_feed(self, upcoming_parashot: List[Dict[str, Any]], location: str, sefaria_client) -> str:
-        """Generate RSS feed for upcoming weekly Torah portions"""
-        
-        rss = ET.Element("rss", version="2.0")
-        rss.set("xmlns:content", "http://purl.org/rss/1.0/modules/content/")
+    async def stream_upcoming_weekly_feed(self, upcoming_parashot: List[Dict[str, Any]], location: str,
+                                          sefaria_client, failed: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """Yield the upcoming weekly feed in chunks, each item as soon as its portion resolves.
         
-        channel = ET.SubElement(rss, "channel")
+        Portions that can't be fetched or rendered are left out; with failed,
+        their names are appended to it so callers can tell the feed is incomplete.
+        """
         
         # Channel metadata
-        ET.SubElement(channel, "title").text = f"Upcoming Torah Portions - JPS Translation ({location.title()})"
-        ET.SubElement(channel, "description").text = "Upcoming weekly Torah portions with full JPS English text"
-        ET.SubElement(channel, "link").text = f"{self.base_url}/feeds/weekly/{location}"
-        ET.SubElement(channel, "language").text = "en-us"
-        ET.SubElement(channel, "lastBuildDate").text = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")
-        
-        # Create items for each upcoming Torah portion
-        for parasha in upcoming_parashot:
+        channel = self._channel(
+            f"Upcoming Torah Portions - JPS Translation ({location.title()})",
+            "Upcoming weekly Torah portions with full JPS English text",
+            f"{self.base_url}/feeds/weekly/{location}"
+        )
+        yield self.writer.header(channel)
+        
+        # Reuse items rendered by earlier rebuilds; only the rest need their text
+        self._check_texts(sefaria_client)
+        keys = [("weekly", location, parasha['name_english'], parasha['date'], None) for parasha in upcoming_parashot]
+        cached = [self.items.get(key) for key in keys]
+        missing = [parasha for parasha, item in zip(upcoming_parashot, cached) if item is None]
+        
+        # Fetch Torah text for the remaining portions concurrently
+        labels = {"kind": "weekly", "location": location_label(location)}
+        prefetches = self._start_prefetch(sefaria_client, missing, False, labels)
+        fetches = self._start_fetches(sefaria_client.get_torah_portion, missing, labels, prefetches)
+        
+        async def render(parasha, fetch):
+            # Each portion is rendered as soon as its text arrives
+            torah_text = await fetch
+            if not torah_text:
+                return None
             try:
-                # Get Torah text for this portion
-                torah_text = await sefaria_client.get_torah_portion(parasha)
-                
-                if torah_text:
-                    item = ET.SubElement(channel, "item")
-                    
-                    # Make the date prominent in the title
-                    date_str = parasha['date'].strftime('%B %d, %Y')
-                    weekday = parasha['date'].strftime('%A')
-                    title = f"Parashat {parasha['name_english']} - {weekday}, {date_str}"
-                    ET.SubElement(item, "title").text = title
-                    ET.SubElement(item, "link").text = f"{self.base_url}/portion/{parasha['name_english']}"
-                    ET.SubElement(item, "guid").text = f"{parasha['name_english']}-{parasha['date']}"
-                    
-                    # Use the parasha date for publication
-                    pub_date = datetime.combine(parasha['date'], datetime.min.time()).replace(tzinfo=timezone.utc)
-                    ET.SubElement(item, "pubDate").text = pub_date.strftime("%a, %d %b %Y 00:00:00 %z")
-                    
-                    # Description with prominent date information
-                    description = f"📅 SHABBAT DATE: {weekday}, {date_str}\n\n"
-                    description += f"Torah Portion: Parashat {parasha['name_english']}\n"
-                    description += f"Torah Reference: {torah_text.get('reference', '')}\n"
-                    description += f"Translation: {torah_text.get('version', 'JPS Contemporary Torah 2006')}\n\n"
-                    description += f"This Torah portion is read on Shabbat, {date_str}."
-                    ET.SubElement(item, "description").text = description
-                    
-                    # Full content with date information
-                    content = self._format_torah_content_with_date(torah_text, parasha['date'])
-                    content_elem = ET.SubElement(item, "content:encoded")
-                    content_elem.text = f"<![CDATA[{content}]]>"
-                    
+                item, render_seconds, serialize_seconds = await self._render("_render_weekly", parasha, torah_text)
             except Exception as e:
                 print(f"Error processing parasha {parasha.get('name_english', 'unknown')}: {e}")
-                continue
-        
-        return self._prettify_xml(rss)
+                return None
+            STAGE_SECONDS.observe(render_seconds, stage="render", **labels)
+            STAGE_SECONDS.observe(serialize_seconds, stage="serialize", **labels)
+            return item
+        
+        renders = [asyncio.ensure_future(render(parasha, fetch)) for parasha, fetch in zip(missing, fetches)]
+        pending = iter(renders)
+        try:
+            # Create items for each upcoming Torah portion, in order
+            for parasha, key, item in zip(upcoming_parashot, keys, cached):
+                if item is None:
+                    item = await next(pending)
+                    if item is None:
+                        if failed is not None:
+                            failed.append(parasha['name_english'])
+                        continue
+                    self.items.set(key, item)
+                yield item
+        finally:
+            for task in fetches + renders + [task for waits in prefetches for task in waits]:
+                task.cancel()
+        
+        yield self.writer.footer()
     
-    async def generate_upcoming_daily_feed(self, upcoming_parashot: List[Dict[str, Any]], location: str, sefaria_client) -> str:
-        """Generate RSS feed for upcoming daily Torah portions"""
+    async def stream_upcoming_daily_feed(self, upcoming_parashot: List[Dict[str, Any]], location: str,
+                                         sefaria_client, failed: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """Yield the upcoming daily feed in chunks, each parasha's items as soon as they resolve.
         
-        rss = ET.Element("rss", version="2.0")
-        rss.set("xmlns:content", "http://purl.org/rss/1.0/modules/content/")
-        
-        channel = ET.SubElement(rss, "channel")
+        Failed parashot are left out and reported in failed, as for the weekly feed.
+        """
         
         # Channel metadata
-        ET.SubElement(channel, "title").text = f"Daily Torah Portions - JPS Translation ({location.title()})"
-        ET.SubElement(channel, "description").text = "Daily Torah study portions with full JPS English text (includes 2 days back for catch-up)"
-        ET.SubElement(channel, "link").text = f"{self.base_url}/feeds/daily/{location}"
-        ET.SubElement(channel, "language").text = "en-us"
-        ET.SubElement(channel, "lastBuildDate").text = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")
+        channel = self._channel(
+            f"Daily Torah Portions - JPS Translation ({location.title()})",
+            "Daily Torah study portions with full JPS English text (includes 2 days back for catch-up)",
+            f"{self.base_url}/feeds/daily/{location}"
+        )
+        yield self.writer.header(channel)
         
         # Create daily items for each upcoming Torah portion
         # Include items from 2 days ago for catch-up
         today = datetime.now().date()
         two_days_ago = today - timedelta(days=2)
         
+        # Reuse items rendered by earlier rebuilds; a parasha is only fetched
+        # when one of its days in the window isn't cached yet
+        self._check_texts(sefaria_client)
+        cached = []
         for parasha in upcoming_parashot:
+            days = [day for day in range(1, 8) if self._daily_portion_date(parasha['date'], day) >= two_days_ago]
+            items = [self.items.get(("daily", location, parasha['name_english'], parasha['date'], day)) for day in days]
+            cached.append(items if all(items) else None)
+        missing = [parasha for parasha, items in zip(upcoming_parashot, cached) if items is None]
+        
+        # Fetch daily portions for the remaining parashot concurrently
+        labels = {"kind": "daily", "location": location_label(location)}
+        prefetches = self._start_prefetch(sefaria_client, missing, True, labels)
+        fetches = self._start_fetches(sefaria_client.get_daily_portions, missing, labels, prefetches)
+        
+        async def render(parasha, fetch):
+            # Each parasha is rendered as soon as its portions arrive
+            daily_portions = await fetch
+            if not daily_portions:
+                return None
             try:
-                # Get daily portions for this parasha
-                daily_portions = await sefaria_client.get_daily_portions(parasha)
-                
-                if daily_portions:
-                    for portion in daily_portions:
-                        # Calculate date for this day relative to the parasha date
-                        parasha_date = parasha['date']
-                        # Assume Sunday starts the Torah week (day 1 = Sunday)
-                        days_from_sunday = portion['day'] - 1
-                        portion_date = parasha_date - timedelta(days=(parasha_date.weekday() + 1) % 7) + timedelta(days=days_from_sunday)
-                        
-                        # Only include portions from 2 days ago forward
-                        if portion_date >= two_days_ago:
-                            item = ET.SubElement(channel, "item")
-                            
-                            # Make the date prominent in the title
-                            date_str = portion_date.strftime('%B %d, %Y')
-                            weekday = portion_date.strftime('%A')
-                            title = f"{portion['day_name']}, {date_str} - Parashat {portion['parasha']} (Day {portion['day']})"
-                            ET.SubElement(item, "title").text = title
-                            ET.SubElement(item, "link").text = f"{self.base_url}/daily/{portion['parasha']}/{portion['day']}"
-                            ET.SubElement(item, "guid").text = f"{portion['parasha']}-day-{portion['day']}-{parasha['date']}"
-                            
-                            pub_date = datetime.combine(portion_date, datetime.min.time()).replace(tzinfo=timezone.utc)
-                            ET.SubElement(item, "pubDate").text = pub_date.strftime("%a, %d %b %Y 06:00:00 %z")
-                            
-                            # Description with prominent date information
-                            description = f"📅 DAILY STUDY DATE: {weekday}, {date_str}\n\n"
-                            description += f"Day {portion['day']} of 7 - Daily Torah study for {portion['day_name']}\n"
-                            description += f"Parashat {portion['parasha']} - {portion['verse_range']}\n"
-                            description += f"Shabbat Torah portion date: {parasha['date'].strftime('%B %d, %Y')}\n\n"
-                            description += f"This daily portion is for {weekday}, {date_str}."
-                            ET.SubElement(item, "description").text = description
-                            
-                            # Full content with date information
-                            content = self._format_daily_content_with_date(portion, portion_date, parasha['date'])
-                            content_elem = ET.SubElement(item, "content:encoded")
-                            content_elem.text = f"<![CDATA[{content}]]>"
-                        
+                items, render_seconds, serialize_seconds = await self._render(
+                    "_render_daily", parasha, daily_portions, two_days_ago)
             except Exception as e:
                 print(f"Error processing daily portions for {parasha.get('name_english', 'unknown')}: {e}")
-                continue
-        
-        return self._prettify_xml(rss)
+                return None
+            STAGE_SECONDS.observe(render_seconds, stage="render", **labels)
+            STAGE_SECONDS.observe(serialize_seconds, stage="serialize", **labels)
+            return items
+        
+        renders = [asyncio.ensure_future(render(parasha, fetch)) for parasha, fetch in zip(missing, fetches)]
+        pending = iter(renders)
+        try:
+            for parasha, items in zip(upcoming_parashot, cached):
+                if items is None:
+                    rendered = await next(pending)
+                    if rendered is None:
+                        if failed is not None:
+                            failed.append(parasha['name_english'])
+                        continue
+                    items = []
+                    for day, item in rendered:
+                        self.items.set(("daily", location, parasha['name_english'], parasha['date'], day), item)
+                        items.append(item)
+                if items:
+                    yield "".join(items)
+        finally:
+            for task in fetches + renders + [task for waits in prefetches for task in waits]:
+                task.cancel()
+        
+        yield self.writer.footer()
+    
+    async def generate_upcoming_weekly_feed(self, upcoming_parashot: List[Dict[str, Any]], location: str, sefaria_client) -> str:
+        """Generate RSS feed for upcoming weekly Torah portions"""
+        return "".join([chunk async for chunk in
+                        self.stream_upcoming_weekly_feed(upcoming_parashot, location, sefaria_client)])
     
-    def _prettify_xml(self, elem) -> str:
-        """Return a pretty-printed XML string"""
-        from xml.dom import minidom
-        rough_string = ET.tostring(elem, 'unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ")
\ No newline at end of file
+    async def generate_upcoming_daily_feed(self, upcoming_parashot: List[Dict[str, Any]], location: str, sefaria_client) -> str:
+        """Generate RSS feed for upcoming daily Torah portions"""
+        return "".join([chunk async for chunk in
+                        self.stream_upcoming_daily_feed(upcoming_parashot, location, sefaria_client)])
@@ -0,0 +1,56 @@
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# An element is a (tag, text) pair; items and the channel header are lists of them
+Fields = List[Tuple[str, Optional[str]]]
+
+RSS_OPEN = '<rss xmlns:content="http://purl.org/rss/1.0/modules/content/" version="2.0">'
+
+def escape(text: str) -> str:
+    """Escape text the same way xml.dom.minidom does"""
+    return (text.replace("&", "&amp;").replace("<", "&lt;")
+            .replace("\"", "&quot;").replace(">", "&gt;"))
+
+class RSSWriter:
+    """Incremental RSS 2.0 serializer.
+    
+    Emits the document piece by piece so only one item has to be held in
+    memory. Pretty-printed output matches what minidom's toprettyxml
+    produced for the old ElementTree-based generator.
+    """
+    
+    def __init__(self, pretty: bool = True, indent: str = "  "):
+        self.pretty = pretty
+        self.indent = indent if pretty else ""
+        self.newline = "\n" if pretty else ""
+    
+    def _element(self, tag: str, text: Optional[str], depth: int) -> str:
+        pad = self.indent * depth
+        if text is None or text == "":
+            return f"{pad}<{tag}/>{self.newline}"
+        return f"{pad}<{tag}>{escape(text)}</{tag}>{self.newline}"
+    
+    def header(self, channel: Fields) -> str:
+        """XML declaration, <rss>, <channel> and the channel metadata"""
+        parts = [f'<?xml version="1.0" ?>{self.newline}',
+                 f"{RSS_OPEN}{self.newline}",
+                 f"{self.indent}<channel>{self.newline}"]
+        parts.extend(self._element(tag, text, 2) for tag, text in channel)
+        return "".join(parts)
+    
+    def item(self, fields: Fields) -> str:
+        """A single serialized <item>"""
+        pad = self.indent * 2
+        parts = [f"{pad}<item>{self.newline}"]
+        parts.extend(self._element(tag, text, 3) for tag, text in fields)
+        parts.append(f"{pad}</item>{self.newline}")
+        return "".join(parts)
+    
+    def footer(self) -> str:
+        return f"{self.indent}</channel>{self.newline}</rss>{self.newline}"
+    
+    def write(self, channel: Fields, items: Iterable[Fields]) -> Iterator[str]:
+        """Yield the document in chunks, one item at a time"""
+        yield self.header(channel)
+        for fields in items:
+            yield self.item(fields)
+        yield self.footer()
@@ -1,157 +1,296 @@
 import aiohttp
 import asyncio
-from typing import Dict, List, Any
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 import re
 
+from cache import TextStore, texts_overlap
+from corpus import Corpus
+from daily_division import DailyDivider, DAY_NAMES, format_range, number_verses
+from fetch_planner import Span, plan_fetches, slice_response, span_covers, span_ref
+from parashot import TORAH_PORTION_MAP, parse_ref
+from resilience import Upstream, UpstreamError, is_transient
+
 class SefariaClient:
-    def __init__(self):
+    def __init__(self, text_store: Optional[TextStore] = None, corpus: Optional[Corpus] = None,
+                 divider: Optional[DailyDivider] = None, limit: int = 20, limit_per_host: int = 8,
+                 total_timeout: float = 30, connect_timeout: float = 5,
+                 keepalive_timeout: float = 30, dns_cache_ttl: int = 300,
+                 upstream: Optional[Upstream] = None):
         self.base_url = "https://www.sefaria.org/api"
         self.session = None
+        self._closed = False
+        # Connection pool settings; every upstream call shares one session
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        # Bound every request so a hung upstream can't stall a feed rebuild
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.version = 'The Contemporary Torah, Jewish Publication Society, 2006'
+        self.language = 'en'
+        # Raw texts never change, so they're kept independently of feed TTLs
+        self.text_store = text_store
+        # Prebuilt local bundle; portions it covers never touch the network
+        self.corpus = corpus
+        # Retries and circuit breaking; the text store already keeps every
+        # successful response, so only remember them here without one
+        self.upstream = upstream or Upstream("Sefaria", keep_last_good=text_store is None)
+        self.divider = divider or DailyDivider()
+        # Responses sliced out by prefetch, when there's no text store to keep them
+        self._prefetched: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_prefetched = 64
+        self._invalidations = 0
+    
+    async def open(self) -> aiohttp.ClientSession:
+        """Open the pooled session, e.g. from the app's startup, and return it"""
+        self._closed = False
+        return await self.get_session()
     
-    async def _get_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+    async def get_session(self) -> aiohttp.ClientSession:
+        """The pooled session every upstream call shares, opened on first use.
+        
+        After close() this raises instead, so work still running at shutdown
+        can't open a connector that nothing will close; open() reopens it.
+        """
+        if self._closed:
+            raise RuntimeError("Sefaria client is closed")
+        if not self.session or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
         return self.session
     
     async def get_torah_portion(self, parasha: Dict[str, Any]) -> Dict[str, Any]:
         """Get full Torah portion text from Sefaria"""
         if not parasha:
             return None
-            
-        session = await self._get_session()
         
         try:
             parasha_name = parasha['name_english']
             
-            # Map Torah portions to their Torah book references
-            # This is a simplified mapping - in a real app you'd want a complete mapping
-            torah_portion_map = {
-                "Bereishit": "Genesis.1.1-6.8",
-                "Noach": "Genesis.6.9-11.32", 
-                "Lech-Lecha": "Genesis.12.1-17.27",
-                "Vayera": "Genesis.18.1-22.24",
-                "Chayei Sara": "Genesis.23.1-25.18",
-                "Toldot": "Genesis.25.19-28.9",
-                "Vayetzei": "Genesis.28.10-32.3",
-                "Vayishlach": "Genesis.32.4-36.43",
-                "Vayeshev": "Genesis.37.1-40.23",
-                "Miketz": "Genesis.41.1-44.17",
-                "Vayigash": "Genesis.44.18-47.27",
-                "Vayechi": "Genesis.47.28-50.26",
-                "Shemot": "Exodus.1.1-6.1",
-                "Vaera": "Exodus.6.2-9.35",
-                "Bo": "Exodus.10.1-13.16",
-                "Beshalach": "Exodus.13.17-17.16",
-                "Yitro": "Exodus.18.1-20.23",
-                "Mishpatim": "Exodus.21.1-24.18",
-                "Terumah": "Exodus.25.1-27.19",
-                "Tetzaveh": "Exodus.27.20-30.10",
-                "Ki Tisa": "Exodus.30.11-34.35",
-                "Vayakhel": "Exodus.35.1-38.20",
-                "Pekudei": "Exodus.38.21-40.38",
-                "Vayikra": "Leviticus.1.1-5.26",
-                "Tzav": "Leviticus.6.1-8.36",
-                "Shmini": "Leviticus.9.1-11.47",
-                "Tazria": "Leviticus.12.1-13.59",
-                "Metzora": "Leviticus.14.1-15.33",
-                "Achrei Mot": "Leviticus.16.1-18.30",
-                "Kedoshim": "Leviticus.19.1-20.27",
-                "Emor": "Leviticus.21.1-24.23",
-                "Behar": "Leviticus.25.1-26.2",
-                "Bechukotai": "Leviticus.26.3-27.34",
-                "Bamidbar": "Numbers.1.1-4.20",
-                "Nasso": "Numbers.4.21-7.89",
-                "Beha'alotcha": "Numbers.8.1-12.16",
-                "Sh'lach": "Numbers.13.1-15.41",
-                "Korach": "Numbers.16.1-18.32",
-                "Chukat": "Numbers.19.1-22.1",
-                "Balak": "Numbers.22.2-25.9",
-                "Pinchas": "Numbers.25.10-30.1",
-                "Matot": "Numbers.30.2-32.42",
-                "Masei": "Numbers.33.1-36.13",
-                "Devarim": "Deuteronomy.1.1-3.22",
-                "Vaetchanan": "Deuteronomy.3.23-7.11",
-                "Eikev": "Deuteronomy.7.12-11.25",
-                "Re'eh": "Deuteronomy.11.26-16.17",
-                "Shoftim": "Deuteronomy.16.18-21.9",
-                "Ki Teitzei": "Deuteronomy.21.10-25.19",
-                "Ki Tavo": "Deuteronomy.26.1-29.8",
-                "Nitzavim": "Deuteronomy.29.9-30.20",
-                "Vayeilech": "Deuteronomy.31.1-31.30",
-                "Ha'Azinu": "Deuteronomy.32.1-32.52",
-                "V'Zot HaBerachah": "Deuteronomy.33.1-34.12"
-            }
-            
             # Try to find the Torah reference
-            ref = torah_portion_map.get(parasha_name)
+            ref = TORAH_PORTION_MAP.get(parasha_name)
             
             if not ref:
                 # If not in our map, try alternative names or just return a sample
                 print(f"Torah portion {parasha_name} not found in mapping, using sample text")
                 ref = "Genesis.1.1-1.31"  # Default to Genesis 1 as sample
             
-            # Fetch from Sefaria
-            url = f"{self.base_url}/texts/{ref}"
-            params = {
-                'lang': 'en',
-                'version': 'The Contemporary Torah, Jewish Publication Society, 2006'
-            }
+            portion = await self.get_ref_text(ref)
+            if portion is None:
+                return None
             
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    text = data.get('text', [])
-                    
-                    # Extract the correct verse range from the response
-                    filtered_text = self._extract_verse_range(text, ref)
-                    
-                    return {
-                        'parasha': parasha_name,
-                        'reference': ref.replace('.', ' ').replace('-', '-'),
-                        'text': filtered_text,
-                        'hebrew': data.get('he', []),
-                        'version': data.get('versionTitle', 'JPS Contemporary Torah 2006'),
-                        'source': data.get('versionSource', '')
-                    }
-                else:
-                    print(f"Sefaria API error: {response.status}")
-                    return None
+            return {
+                'parasha': parasha_name,
+                'ref': ref,
+                'reference': ref.replace('.', ' ').replace('-', '-'),
+                **portion
+            }
                     
         except Exception as e:
             print(f"Error fetching Torah text: {e}")
             return None
     
-    async def get_daily_portions(self, parasha: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Divide weekly Torah portion into daily readings"""
-        torah_text = await self.get_torah_portion(parasha)
-        if not torah_text or not torah_text.get('text'):
+    async def get_ref_text(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Get the verses of ref grouped by chapter, from the corpus when it covers ref"""
+        if self.corpus and self.corpus.has_ref(ref):
+            return {
+                'text': self.corpus.get_ref(ref),
+                'hebrew': [],
+                'version': self.corpus.version_title or 'JPS Contemporary Torah 2006',
+                'source': self.corpus.version_source
+            }
+        
+        data = await self.fetch_text(ref)
+        if data is None:
+            return None
+        
+        text = data.get('text', [])
+        if text and not isinstance(text[0], list):
+            text = [text]  # Single chapter refs come back flat
+        
+        return {
+            # Extract the correct verse range from the response
+            'text': self._extract_verse_range(text, ref),
+            'hebrew': data.get('he', []),
+            'version': data.get('versionTitle', 'JPS Contemporary Torah 2006'),
+            'source': data.get('versionSource', '')
+        }
+    
+    def portion_refs(self, parasha: Dict[str, Any], daily: bool = False) -> List[str]:
+        """Refs get_torah_portion, or with daily get_daily_portions, fetches for parasha"""
+        ref = TORAH_PORTION_MAP.get(parasha['name_english'])
+        if not ref:
             return []
+        if daily:
+            return self.divider.aliyah_refs(parasha['name_english']) or [ref]
+        return [ref]
+    
+    def _has_text(self, ref: str) -> bool:
+        if self.corpus and self.corpus.has_ref(ref):
+            return True
+        if self.text_store:
+            return self.text_store.get(ref, self.version, self.language) is not None
+        return ref in self._prefetched
+    
+    def _keep(self, ref: str, data: Dict[str, Any]) -> None:
+        if self.text_store:
+            self.text_store.set(ref, self.version, self.language, data)
+            return
+        self._prefetched[ref] = data
+        self._prefetched.move_to_end(ref)
+        while len(self._prefetched) > self.max_prefetched:
+            self._prefetched.popitem(last=False)
+    
+    def start_prefetch(self, refs: Iterable[str]) -> Dict[str, asyncio.Task]:
+        """Start fetching the texts for refs in as few Sefaria requests as possible.
         
-        # Simple division: split text into 7 parts
-        full_text = torah_text['text']
-        if isinstance(full_text[0], list):
-            # Flatten nested arrays (chapters/verses)
-            flattened = []
-            for chapter in full_text:
-                flattened.extend(chapter)
-            full_text = flattened
+        Refs that are already available are skipped. The rest are merged into
+        runs of whole chapters, usually one per book, each fetched by its own
+        task. When a run lands, each ref's response is sliced out locally and
+        kept where fetch_text will find it. Returns the task covering each
+        ref, so callers can go ahead as soon as their own refs are in. Refs a
+        failed request should have covered are left for fetch_text to get
+        one by one.
+        """
+        needed = [ref for ref in dict.fromkeys(refs) if not self._has_text(ref)]
+        tasks = {}
+        for span in plan_fetches(needed):
+            covered = [ref for ref in needed if span_covers(span, ref)]
+            task = asyncio.ensure_future(self._prefetch_span(span, covered))
+            for ref in covered:
+                tasks[ref] = task
+        return tasks
+    
+    async def _prefetch_span(self, span: Span, refs: List[str]) -> bool:
+        try:
+            data = await self._request(span_ref(span))
+        except Exception as e:
+            print(f"Error prefetching {span_ref(span)}: {e}")
+            return False
+        if data is None:
+            return False
+        
+        for ref in refs:
+            sliced = slice_response(data, span, ref)
+            if sliced is not None:
+                self._keep(ref, sliced)
+        return True
+    
+    async def prefetch(self, refs: Iterable[str]) -> int:
+        """Fetch the texts for refs as start_prefetch does and wait for all of them.
+        
+        Returns the number of requests made.
+        """
+        tasks = set(self.start_prefetch(refs).values())
+        await asyncio.gather(*tasks)
+        return len(tasks)
+    
+    async def fetch_text(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Get the raw /texts response for ref, from the text store when possible"""
+        if self.text_store:
+            data = self.text_store.get(ref, self.version, self.language)
+            if data is not None:
+                return data
+        elif ref in self._prefetched:
+            return self._prefetched[ref]
+        
+        data = await self._request(ref)
+        if data is not None and self.text_store:
+            self.text_store.set(ref, self.version, self.language, data)
+        return data
+    
+    async def _request(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Fetch the /texts response for ref from Sefaria"""
+        url = f"{self.base_url}/texts/{ref}"
+        params = {
+            'lang': self.language,
+            'version': self.version
+        }
+        
+        async def fetch():
+            session = await self.get_session()
+            async with session.get(url, params=params) as response:
+                if response.status != 200:
+                    # Only 429/5xx are retried; anything else fails straight away
+                    raise UpstreamError(f"Sefaria API error: {response.status}", response.status)
+                return await response.json()
+        
+        try:
+            return await self.upstream.call(ref, fetch)
+        except UpstreamError as e:
+            if is_transient(e):
+                raise
+            print(e)
+            return None
+    
+    def invalidate_texts(self, ref: Optional[str] = None) -> int:
+        """Drop stored Sefaria texts overlapping ref, or all of them.
         
-        total_verses = len(full_text)
-        verses_per_day = max(1, total_verses // 7)
+        Returns the number of texts dropped from the text store.
+        """
+        self._invalidations += 1
+        for stored_ref in list(self._prefetched):
+            if ref is None or texts_overlap(stored_ref, ref):
+                del self._prefetched[stored_ref]
+        if not self.text_store:
+            return 0
+        return self.text_store.invalidate(ref)
+    
+    def text_generation(self) -> Tuple[int, int]:
+        """Changes whenever texts are invalidated, by this client or, through
+        a shared text store, by another process. Anything rendered from
+        texts of an earlier generation may be out of date.
+        """
+        return self._invalidations, self.text_store.generation() if self.text_store else 0
+    
+    async def get_daily_portions(self, parasha: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Divide weekly Torah portion into daily readings.
+        
+        Days follow the aliyot when they're known, fetching only each day's
+        slice; otherwise the whole portion is fetched and split into seven
+        days of near-equal verse counts.
+        """
+        parasha_name = parasha['name_english']
+        ref = TORAH_PORTION_MAP.get(parasha_name)
+        if not ref:
+            print(f"Torah portion {parasha_name} not found in mapping, skipping daily portions")
+            return []
+        book = parse_ref(ref)[0]
+        
+        day_refs = self.divider.aliyah_refs(parasha_name)
+        if day_refs:
+            slices = await asyncio.gather(*(self.get_ref_text(day_ref) for day_ref in day_refs))
+            if any(s is None or not s.get('text') for s in slices):
+                return []
+            days = []
+            for day_ref, day_slice in zip(day_refs, slices):
+                _, start_chapter, start_verse, end_chapter, end_verse = parse_ref(day_ref)
+                days.append({
+                    'verses': number_verses(day_slice['text'], day_ref),
+                    'verse_range': format_range(book, (start_chapter, start_verse), (end_chapter, end_verse))
+                })
+        else:
+            torah_text = await self.get_torah_portion(parasha)
+            if not torah_text or not torah_text.get('text'):
+                return []
+            days = self.divider.balanced_days(number_verses(torah_text['text'], ref), book)
         
         daily_portions = []
-        for day in range(7):
-            start_idx = day * verses_per_day
-            end_idx = start_idx + verses_per_day if day < 6 else total_verses
-            
-            daily_text = full_text[start_idx:end_idx]
-            
+        for day, portion in enumerate(days):
             daily_portions.append({
                 'day': day + 1,
-                'day_name': ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'][day],
-                'parasha': parasha['name_english'],
-                'text': daily_text,
-                'verse_range': f"Verses {start_idx + 1}-{end_idx}"
+                'day_name': DAY_NAMES[day],
+                'parasha': parasha_name,
+                'book': book,
+                'text': [verse for _, verse in portion['verses']],
+                'verses': portion['verses'],
+                'verse_range': portion['verse_range']
             })
         
         return daily_portions
@@ -216,5 +355,7 @@ class SefariaClient:
             return text  # Return original text if parsing fails
 
     async def close(self):
+        self._closed = True
         if self.session:
-            await self.session.close()
\ No newline at end of file
+            await self.session.close()
+        self.session = None
\ No newline at end of file
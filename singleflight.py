@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution"""
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.coalesced = 0  # Total callers that piggy-backed on another call
+    
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+    
+    def start(self, key: str, func: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start func for key unless a run is already in flight, and return the run's task.
+        
+        The key is in flight as soon as this returns, so a caller that
+        can't await the result yet still keeps later callers from starting
+        a second run.
+        """
+        task = self._inflight.get(key)
+        if task:
+            self._waiters[key] += 1
+            self.coalesced += 1
+            return task
+        
+        # Run as a task so a disconnecting caller can't cancel the work
+        # the other waiters depend on
+        task = asyncio.ensure_future(func())
+        self._inflight[key] = task
+        self._waiters[key] = 0
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return task
+    
+    async def cancel_all(self) -> None:
+        """Cancel every run in flight and wait for them to finish, e.g. at shutdown"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func for key, or wait for the run already in flight for key"""
+        return await asyncio.shield(self.start(key, func))
+    
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        waiters = self._waiters.pop(key, 0)
+        if waiters:
+            print(f"Single-flight {key}: coalesced {waiters} waiting requests")
+        # Mark the exception retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,76 @@
+import asyncio
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+# The modules under test live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cache import FileCache, TieredCache
+
+class StubSefaria:
+    """Sefaria stand-in with one verse per portion, for driving the app without the network.
+    
+    Parashot in down have no text, as during an outage, and daily portions
+    of those in malformed are missing a field on their last day. Each fetch
+    takes delay seconds, long enough for concurrent requests to overlap.
+    """
+    
+    def __init__(self):
+        self.down = set()
+        self.malformed = set()
+        self.delay = 0.0
+        self.fetches = 0
+    
+    def portion_refs(self, parasha, daily=False):
+        return []
+    
+    def start_prefetch(self, refs):
+        return {}
+    
+    def text_generation(self):
+        return 0
+    
+    async def _fetch(self, parasha):
+        self.fetches += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return parasha['name_english'] not in self.down
+    
+    async def get_torah_portion(self, parasha):
+        if not await self._fetch(parasha):
+            return None
+        return {'parasha': parasha['name_english'], 'reference': 'Genesis 1 1-1 3',
+                'text': [['In the beginning']], 'version': 'v', 'source': ''}
+    
+    async def get_daily_portions(self, parasha):
+        if not await self._fetch(parasha):
+            return []
+        portions = [{'day': day, 'day_name': f"Day {day}", 'parasha': parasha['name_english'], 'book': 'Genesis',
+                     'text': ['In the beginning'], 'verses': [((1, day), 'In the beginning')],
+                     'verse_range': f"Genesis 1:{day}"} for day in range(1, 8)]
+        if parasha['name_english'] in self.malformed:
+            del portions[-1]['day_name']
+        return portions
+
+async def upcoming(location, count=8):
+    """Stand-in for get_upcoming_parashot_async: P0, P1, ... a week apart from today"""
+    return [{'name_english': f"P{week}", 'name': "x", 'date': date.today() + timedelta(weeks=week)}
+            for week in range(count)]
+
+@pytest.fixture
+def sefaria():
+    return StubSefaria()
+
+@pytest.fixture
+def feed_app(monkeypatch, tmp_path, sefaria):
+    """The app module, using sefaria, upcoming and an empty feed cache in tmp_path, without streaming"""
+    import app
+    monkeypatch.setattr(app, "STREAM_FEEDS", False)
+    monkeypatch.setattr(app, "cache", TieredCache(FileCache(str(tmp_path))))
+    monkeypatch.setattr(app, "sefaria", sefaria)
+    monkeypatch.setattr(app.calendar, "get_upcoming_parashot_async", upcoming)
+    app.rss_gen.clear_caches()
+    return app
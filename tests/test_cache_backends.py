@@ -0,0 +1,230 @@
+import sqlite3
+import struct
+import time
+
+import pytest
+
+from cache import ENTRY_HEADER, FileCache, decode_entry, encode_entry, make_entry
+from cache_backends import (SLOT_HEADER_SIZE, KeyValueCache, KeyValueLock, LocalKeyValueStore, MmapCache,
+                            SQLiteCache, create_backend)
+
+# Every backend that runs without a server; "local" is the redis code path
+OFFLINE_BACKENDS = ("file", "sqlite", "mmap", "local")
+FEED = "<rss><channel><title>Bereshit</title></channel></rss>"
+
+@pytest.fixture(params=OFFLINE_BACKENDS)
+def backend(request, tmp_path):
+    return create_backend(request.param, cache_dir=str(tmp_path), mmap_slots=4, mmap_slot_bytes=64 * 1024)
+
+def test_create_backend_types(tmp_path):
+    expected = {"file": FileCache, "sqlite": SQLiteCache, "mmap": MmapCache, "local": KeyValueCache}
+    for name, cls in expected.items():
+        assert type(create_backend(name, cache_dir=str(tmp_path / name))) is cls
+    with pytest.raises(ValueError):
+        create_backend("memcached", cache_dir=str(tmp_path))
+
+def test_set_then_get_entry(backend):
+    stored = backend.set("weekly_diaspora", FEED)
+    entry = backend.get_entry("weekly_diaspora")
+    
+    assert entry == stored
+    assert entry['content'] == FEED
+    assert set(entry['encodings']) >= {"gzip"}
+    assert backend.get("weekly_diaspora") == FEED
+    assert backend.get_entry("daily_diaspora") is None
+
+def test_set_replaces_entry(backend):
+    backend.set("weekly_diaspora", FEED)
+    backend.set("weekly_diaspora", FEED.replace("Bereshit", "Noach"))
+    
+    assert "Noach" in backend.get_entry("weekly_diaspora")['content']
+
+def test_delete(backend):
+    backend.set("weekly_diaspora", FEED)
+    backend.set("weekly_israel", FEED)
+    backend.delete("weekly_diaspora")
+    backend.delete("never_set")
+    
+    assert backend.get_entry("weekly_diaspora") is None
+    assert backend.get_entry("weekly_israel") is not None
+
+def test_get_expires_old_entries(backend):
+    backend.set("weekly_diaspora", FEED)
+    
+    content, age_hours = backend.get_with_age("weekly_diaspora")
+    assert content == FEED and age_hours < 1
+    assert backend.get("weekly_diaspora", max_age_hours=-1) is None
+    assert backend.get_entry("weekly_diaspora") is None
+
+def test_lock_is_exclusive(backend):
+    first, second = backend.lock("weekly_diaspora"), backend.lock("weekly_diaspora")
+    
+    assert first.acquire()
+    assert not second.acquire()
+    assert backend.lock("weekly_israel").acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+def test_entry_round_trip():
+    entry = make_entry(FEED, {"gzip": b"\x1f\x8b gzip", "br": b"brotli"})
+    
+    assert decode_entry(b"".join(encode_entry(entry))) == entry
+
+@pytest.mark.parametrize("corrupt", [
+    lambda blob: blob[:4],
+    lambda blob: b"NOTAFEED" + blob[8:],
+    lambda blob: blob[:-1],
+    lambda blob: blob + b"x",
+])
+def test_decode_rejects_corrupt_entries(corrupt):
+    blob = b"".join(encode_entry(make_entry(FEED, {"gzip": b"gzip"})))
+    
+    with pytest.raises(ValueError):
+        decode_entry(corrupt(blob))
+
+def test_corrupt_file_entry_is_dropped(tmp_path):
+    backend = FileCache(str(tmp_path))
+    backend.set("weekly_diaspora", FEED)
+    path = backend._get_cache_path("weekly_diaspora")
+    path.write_bytes(path.read_bytes()[:ENTRY_HEADER.size + 3])
+    
+    assert backend.get_entry("weekly_diaspora") is None
+    assert not path.exists()
+
+def test_corrupt_sqlite_entry_is_dropped(tmp_path):
+    backend = SQLiteCache(str(tmp_path / "feeds.db"))
+    backend.set("weekly_diaspora", FEED)
+    backend._connection().execute("UPDATE entries SET body = ? WHERE key = ?", (b"garbage", "weekly_diaspora"))
+    
+    assert backend.get_entry("weekly_diaspora") is None
+    assert backend._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0
+
+def test_mmap_entries_are_shared_between_mappings(tmp_path):
+    path = str(tmp_path / "feeds.mmap")
+    writer, reader = MmapCache(path, 4, 64 * 1024), MmapCache(path, 4, 64 * 1024)
+    
+    writer.set("weekly_diaspora", FEED)
+    assert reader.get_entry("weekly_diaspora")['content'] == FEED
+    
+    writer.delete("weekly_diaspora")
+    assert reader.get_entry("weekly_diaspora") is None
+
+def test_mmap_new_layout_starts_empty(tmp_path):
+    path = str(tmp_path / "feeds.mmap")
+    MmapCache(path, 4, 64 * 1024).set("weekly_diaspora", FEED)
+    
+    assert MmapCache(path, 4, 64 * 1024).get_entry("weekly_diaspora") is not None
+    assert MmapCache(path, 8, 64 * 1024).get_entry("weekly_diaspora") is None
+    # The new layout gets a file of its own; workers on the old one are undisturbed
+    assert MmapCache(path, 4, 64 * 1024).get_entry("weekly_diaspora") is not None
+
+def test_mmap_refuses_a_file_laid_out_differently(tmp_path):
+    backend = MmapCache(str(tmp_path / "feeds.mmap"), 4, 64 * 1024)
+    backend.path.write_bytes(b"not a cache file")
+    
+    with pytest.raises(RuntimeError):
+        backend.get_entry("weekly_diaspora")
+    assert backend.path.read_bytes() == b"not a cache file"
+
+def test_mmap_write_bumps_sequence_by_two(tmp_path):
+    backend = MmapCache(str(tmp_path / "feeds.mmap"), 2, 64 * 1024)
+    backend.set("weekly_diaspora", FEED)
+    slot = backend._find(b"weekly_diaspora")
+    sequence = backend._read_header(slot)[0]
+    
+    backend.set("weekly_diaspora", FEED)
+    assert backend._read_header(slot)[0] == sequence + 2
+    assert sequence % 2 == 0
+
+def test_mmap_reader_skips_slot_mid_write(tmp_path):
+    backend = MmapCache(str(tmp_path / "feeds.mmap"), 2, 64 * 1024)
+    backend.set("weekly_diaspora", FEED)
+    slot = backend._find(b"weekly_diaspora")
+    offset = backend._slot_offset(slot)
+    sequence = backend._read_header(slot)[0]
+    
+    # An odd sequence number is what a writer leaves while it copies the payload
+    struct.pack_into("<Q", backend._map(), offset, sequence + 1)
+    assert backend.get_entry("weekly_diaspora") is None
+    
+    struct.pack_into("<Q", backend._map(), offset, sequence + 2)
+    assert backend.get_entry("weekly_diaspora")['content'] == FEED
+
+def test_mmap_evicts_oldest_entry_when_full(tmp_path):
+    backend = MmapCache(str(tmp_path / "feeds.mmap"), 2, 64 * 1024)
+    now = time.time()
+    for age, key in ((30, "weekly_diaspora"), (10, "weekly_israel"), (20, "daily_diaspora")):
+        entry = make_entry(FEED)
+        entry['timestamp'] = now - age
+        backend._write(key, entry)
+    
+    assert backend.get_entry("weekly_diaspora") is None
+    assert backend.get_entry("weekly_israel") is not None
+    assert backend.get_entry("daily_diaspora") is not None
+
+def test_mmap_rejects_entry_larger_than_a_slot(tmp_path):
+    backend = MmapCache(str(tmp_path / "feeds.mmap"), 2, SLOT_HEADER_SIZE + 256)
+    entry = make_entry("x" * 1024, {})
+    
+    with pytest.raises(ValueError):
+        backend._write("weekly_diaspora", entry)
+    # set reports the failure but still returns the entry for this request
+    assert backend.set("weekly_diaspora", "x" * 1024)['content'] == "x" * 1024
+    assert backend.get_entry("weekly_diaspora") is None
+
+def test_mmap_hashes_long_keys(tmp_path):
+    backend = MmapCache(str(tmp_path / "feeds.mmap"), 2, 64 * 1024)
+    key = "weekly_" + "x" * 100
+    backend.set(key, FEED)
+    
+    assert backend.get_entry(key)['content'] == FEED
+    assert backend.get_entry("weekly_" + "x" * 99) is None
+
+def test_local_store_expires_keys():
+    store = LocalKeyValueStore()
+    store.set("a", "1", px=1)
+    store.set("b", b"2", ex=60)
+    time.sleep(0.01)
+    
+    assert store.get("a") is None
+    assert store.get("b") == b"2"
+    assert store.set("b", b"3", nx=True) is None
+    assert store.delete("a", "b") == 1
+
+def test_key_value_lock_expires_and_only_releases_its_own():
+    store = LocalKeyValueStore()
+    first = KeyValueLock(store, "lock", ttl_seconds=0.01)
+    assert first.acquire()
+    time.sleep(0.02)
+    
+    # The first holder's lock lapsed, so a later holder can take it
+    second = KeyValueLock(store, "lock")
+    assert second.acquire()
+    first.release()
+    assert not KeyValueLock(store, "lock").acquire()
+    second.release()
+    assert KeyValueLock(store, "lock").acquire()
+
+def test_key_value_cache_uses_prefixed_keys():
+    store = LocalKeyValueStore()
+    backend = KeyValueCache(store, prefix="test:")
+    backend.set("weekly_diaspora", FEED)
+    
+    assert store.get("test:feed:weekly_diaspora") is not None
+    store.set("test:feed:weekly_diaspora", b"garbage")
+    assert backend.get_entry("weekly_diaspora") is None
+    assert store.get("test:feed:weekly_diaspora") is None
+
+def test_sqlite_cache_from_the_old_schema_starts_afresh(tmp_path):
+    path = tmp_path / "feeds.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, timestamp REAL NOT NULL, etag TEXT NOT NULL, "
+                           "encodings TEXT NOT NULL, body BLOB NOT NULL)")
+        connection.execute("INSERT INTO entries VALUES ('weekly_diaspora', 0, '\"x\"', '', x'00')")
+    connection.close()
+    
+    backend = SQLiteCache(str(path))
+    assert backend.get_entry("weekly_diaspora") is None
+    backend.set("weekly_diaspora", FEED)
+    assert backend.get_entry("weekly_diaspora")['content'] == FEED
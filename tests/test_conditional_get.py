@@ -0,0 +1,85 @@
+import asyncio
+import gzip
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from cache import variant_etag
+
+FEED = "<rss>cached</rss>"
+
+@pytest.fixture
+def cached_feed(feed_app):
+    """A fresh weekly_israel entry with gzip and br variants, whether or not brotli is installed"""
+    encodings = {'gzip': gzip.compress(FEED.encode('utf-8'), mtime=0), 'br': b"not really brotli"}
+    return feed_app.cache.set("weekly_israel", FEED, encodings)
+
+def get(feed_app, **headers):
+    async def main():
+        transport = httpx.ASGITransport(app=feed_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/feeds/weekly/israel", headers=headers)
+    
+    return asyncio.run(main())
+
+def test_if_none_match(feed_app, cached_feed):
+    etag = cached_feed['etag']
+    
+    assert get(feed_app, **{"Accept-Encoding": "identity", "If-None-Match": etag}).status_code == 304
+    # Weak comparison: a W/ prefix still matches
+    assert get(feed_app, **{"Accept-Encoding": "identity", "If-None-Match": f"W/{etag}"}).status_code == 304
+    assert get(feed_app, **{"Accept-Encoding": "identity", "If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert get(feed_app, **{"Accept-Encoding": "identity", "If-None-Match": "*"}).status_code == 304
+    
+    response = get(feed_app, **{"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.text == FEED
+    
+    # Another variant's ETag doesn't match this one
+    gzip_etag = variant_etag(etag, "gzip")
+    assert get(feed_app, **{"Accept-Encoding": "identity", "If-None-Match": gzip_etag}).status_code == 200
+    assert get(feed_app, **{"Accept-Encoding": "gzip", "If-None-Match": gzip_etag}).status_code == 304
+
+def test_if_modified_since(feed_app, cached_feed):
+    modified = cached_feed['modified']
+    
+    response = get(feed_app, **{"Accept-Encoding": "identity",
+                                "If-Modified-Since": formatdate(modified, usegmt=True)})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == cached_feed['etag']
+    
+    earlier = formatdate(modified - 3600, usegmt=True)
+    assert get(feed_app, **{"Accept-Encoding": "identity", "If-Modified-Since": earlier}).status_code == 200
+    assert get(feed_app, **{"Accept-Encoding": "identity", "If-Modified-Since": "garbage"}).status_code == 200
+    
+    # If-None-Match takes precedence over If-Modified-Since
+    response = get(feed_app, **{"Accept-Encoding": "identity", "If-None-Match": '"other"',
+                                "If-Modified-Since": formatdate(modified, usegmt=True)})
+    assert response.status_code == 200
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.5, br;q=0", "gzip"),
+    ("identity", None),
+    ("deflate", None),
+])
+def test_accept_encoding(feed_app, cached_feed, accept, expected):
+    response = get(feed_app, **{"Accept-Encoding": accept})
+    
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == expected
+    assert response.headers["ETag"] == variant_etag(cached_feed['etag'], expected)
+    assert response.headers["Vary"] == "Accept-Encoding"
+    if expected != "br":
+        assert response.text == FEED
+
+def test_each_encoding_has_its_own_etag(feed_app, cached_feed):
+    etags = {get(feed_app, **{"Accept-Encoding": accept}).headers["ETag"] for accept in ("identity", "gzip", "br")}
+    
+    assert len(etags) == 3
+    assert cached_feed['etag'] in etags
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+from daily_division import DailyDivider, balance, format_range, number_verses
+from parashot import DOUBLE_PARASHOT, TORAH_PORTION_MAP, combined_name, parse_ref
+
+ALIYOT_PATH = Path(__file__).resolve().parent.parent / "aliyot.json"
+
+def test_committed_aliyot_cover_every_parasha():
+    divider = DailyDivider(str(ALIYOT_PATH))
+    
+    assert len(divider.aliyot) == 54
+    # Only combined parashot, e.g. Vayakhel-Pekudei, are left to balancing
+    combined = {combined_name(pair) for pair in DOUBLE_PARASHOT.items()}
+    assert set(TORAH_PORTION_MAP) - set(divider.aliyot) == combined
+    
+    for parasha in divider.aliyot:
+        refs = divider.aliyah_refs(parasha)
+        assert refs is not None
+        book, start_chapter, start_verse, end_chapter, end_verse = parse_ref(TORAH_PORTION_MAP[parasha])
+        aliyot = [parse_ref(ref) for ref in refs]
+        assert {aliyah[0] for aliyah in aliyot} == {book}
+        assert aliyot[0][1:3] == (start_chapter, start_verse)
+        assert aliyot[-1][3:] == (end_chapter, end_verse)
+        # Each aliyah starts right after the last, in the same chapter or at the next one
+        for (_, _, _, chapter, verse), (_, next_chapter, next_verse, _, _) in zip(aliyot, aliyot[1:]):
+            assert (next_chapter, next_verse) in ((chapter, verse + 1), (chapter + 1, 1))
+
+def test_balance_spreads_the_remainder_over_the_first_days():
+    assert balance(23) == [(0, 4), (4, 8), (8, 11), (11, 14), (14, 17), (17, 20), (20, 23)]
+    assert balance(14) == [(start, start + 2) for start in range(0, 14, 2)]
+    # Fewer verses than days leaves the last days empty rather than failing
+    assert balance(3) == [(0, 1), (1, 2), (2, 3), (3, 3), (3, 3), (3, 3), (3, 3)]
+    assert balance(0) == [(0, 0)] * 7
+
+def test_format_range():
+    assert format_range("Genesis", (4, 19), (4, 22)) == "Genesis 4:19-22"
+    assert format_range("Genesis", (6, 9), (7, 16)) == "Genesis 6:9-7:16"
+    assert format_range("Genesis", (1, 1), (1, 1)) == "Genesis 1:1"
+
+def test_number_verses_continues_across_chapters():
+    text = [["a", "b"], ["c", "d", "e"]]
+    
+    assert number_verses(text, "Genesis.6.21-7.3") == [((6, 21), "a"), ((6, 22), "b"),
+                                                        ((7, 1), "c"), ((7, 2), "d"), ((7, 3), "e")]
+
+def test_balanced_days_cross_chapter_boundaries():
+    # Noach's three chapters, 6:9-8:22 here, as 60 verses
+    text = [[f"6:{v}" for v in range(9, 23)], [f"7:{v}" for v in range(1, 25)], [f"8:{v}" for v in range(1, 23)]]
+    days = DailyDivider().balanced_days(number_verses(text, "Genesis.6.9-8.22"), "Genesis")
+    
+    assert [len(day['verses']) for day in days] == [9, 9, 9, 9, 8, 8, 8]
+    assert [day['verse_range'] for day in days] == [
+        "Genesis 6:9-17", "Genesis 6:18-7:4", "Genesis 7:5-13", "Genesis 7:14-22",
+        "Genesis 7:23-8:6", "Genesis 8:7-14", "Genesis 8:15-22"]
+    assert [verse for day in days for _, verse in day['verses']] == [verse for chapter in text for verse in chapter]
+
+def test_balanced_days_of_a_short_portion():
+    # Fewer verses than days: one each, then empty days
+    days = DailyDivider().balanced_days(number_verses([["a", "b", "c"]], "Deuteronomy.31.1-31.3"), "Deuteronomy")
+    
+    assert [day['verse_range'] for day in days] == ["Deuteronomy 31:1", "Deuteronomy 31:2", "Deuteronomy 31:3",
+                                                    "", "", "", ""]
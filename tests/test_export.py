@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+import export
+
+FEED = "<rss><channel><item>x</item></channel></rss>"
+
+def rendered(failed):
+    async def render_feeds(locations, max_concurrency=4, pretty=True):
+        return {(kind, location): (FEED, list(failed)) for kind in export.FEED_COUNTS for location in locations}
+    return render_feeds
+
+def test_partial_feeds_are_not_swapped_in(monkeypatch, tmp_path):
+    output = tmp_path / "feeds"
+    monkeypatch.setattr(export, "render_feeds", rendered(["Noach"]))
+    
+    with pytest.raises(RuntimeError, match="Noach"):
+        asyncio.run(export.export(str(output)))
+    assert not output.exists()
+    
+    manifest = asyncio.run(export.export(str(output), allow_partial=True))
+    assert output.is_symlink()
+    assert (output / "feeds" / "weekly" / "israel.xml").read_text() == FEED
+    assert manifest["feeds"]["/feeds/weekly"]["items"] == 1
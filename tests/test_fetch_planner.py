@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from benchmark import FixtureSession, synthetic_fixtures
+from fetch_planner import chapter_span, plan_fetches, slice_response, span_covers, span_ref
+from parashot import PARASHOT
+from rss_generator import RSSGenerator
+from sefaria_client import SefariaClient
+
+def chapters(first, last):
+    """A /texts response body for whole chapters first..last, one marker verse each"""
+    return [[f"{chapter}:1", f"{chapter}:2"] for chapter in range(first, last + 1)]
+
+def test_chapter_span():
+    assert chapter_span("Genesis.6.9-11.32") == ("Genesis", 6, 11)
+    assert chapter_span("Exodus.12.1-12.20") == ("Exodus", 12, 12)
+
+def test_overlapping_and_adjacent_refs_merge():
+    # Daily readings overlap and abut; the portions that follow are adjacent
+    refs = ["Genesis.6.9-6.22", "Genesis.7.1-7.16", "Genesis.7.17-8.14", "Genesis.12.1-17.27", "Genesis.18.1-22.24"]
+    
+    assert plan_fetches(refs) == [("Genesis", 6, 8), ("Genesis", 12, 22)]
+
+def test_window_of_consecutive_portions_is_one_request():
+    refs = ["Genesis.44.18-47.27", "Genesis.47.28-50.26"]
+    
+    assert plan_fetches(refs) == [("Genesis", 44, 50)]
+
+def test_window_across_books_is_one_request_per_book():
+    refs = ["Genesis.44.18-47.27", "Exodus.1.1-6.1", "Genesis.47.28-50.26", "Exodus.6.2-9.35"]
+    
+    assert plan_fetches(refs) == [("Genesis", 44, 50), ("Exodus", 1, 9)]
+
+def test_refs_out_of_order_and_repeated():
+    refs = ["Leviticus.9.1-11.47", "Leviticus.6.1-8.36", "Leviticus.6.1-8.36"]
+    
+    assert plan_fetches(refs) == [("Leviticus", 6, 11)]
+    assert plan_fetches([]) == []
+
+def test_span_ref():
+    assert span_ref(("Genesis", 6, 11)) == "Genesis.6-11"
+    assert span_ref(("Numbers", 1, 1)) == "Numbers.1"
+
+def test_span_covers():
+    assert span_covers(("Genesis", 6, 11), "Genesis.6.9-11.32")
+    assert span_covers(("Genesis", 6, 11), "Genesis.8.1-8.14")
+    assert not span_covers(("Genesis", 6, 11), "Genesis.11.1-12.3")
+    assert not span_covers(("Genesis", 6, 11), "Exodus.6.2-9.35")
+
+def test_slice_response_cuts_out_ref_chapters():
+    data = {'text': chapters(44, 50), 'he': chapters(44, 50), 'versionTitle': "JPS", 'versionSource': "src"}
+    
+    sliced = slice_response(data, ("Genesis", 44, 50), "Genesis.47.28-50.26")
+    assert sliced == {'text': chapters(47, 50), 'he': [], 'versionTitle': "JPS", 'versionSource': "src"}
+
+def test_slice_response_single_chapter_comes_back_flat():
+    # Sefaria returns a list of verses, not a list of chapters, for one chapter
+    data = {'text': ["1:1", "1:2", "1:3"]}
+    
+    assert slice_response(data, ("Numbers", 1, 1), "Numbers.1.1-1.3")['text'] == [["1:1", "1:2", "1:3"]]
+
+def test_slice_response_none_when_chapters_missing():
+    # The response stopped two chapters short of the span it was asked for
+    data = {'text': chapters(44, 48)}
+    
+    assert slice_response(data, ("Genesis", 44, 50), "Genesis.47.28-50.26") is None
+    assert slice_response(data, ("Genesis", 44, 50), "Genesis.44.18-47.27")['text'] == chapters(44, 47)
+
+def test_slice_response_none_outside_span():
+    data = {'text': chapters(44, 50)}
+    
+    assert slice_response(data, ("Genesis", 44, 50), "Exodus.1.1-6.1") is None
+    assert slice_response(data, ("Genesis", 44, 50), "Genesis.42.1-44.17") is None
+
+@pytest.mark.parametrize("names, daily, requests", [
+    (PARASHOT[:8], False, 1),
+    (["Vayigash", "Vayechi", "Shemot", "Vaera"], False, 2),
+    (PARASHOT[:4], True, 1),
+])
+def test_feed_rebuild_request_count(names, daily, requests):
+    client = SefariaClient()
+    client.session = FixtureSession(synthetic_fixtures())
+    parashot = [{'name_english': name, 'name': name, 'date': date.today() + timedelta(weeks=week)}
+                for week, name in enumerate(names)]
+    generator = RSSGenerator(item_cache_size=0)
+    generate = generator.generate_upcoming_daily_feed if daily else generator.generate_upcoming_weekly_feed
+    
+    feed = asyncio.run(generate(parashot, "diaspora", client))
+    
+    assert client.session.requests == requests
+    assert feed.count("<item>") >= len(names)
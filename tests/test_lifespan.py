@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+import app
+from sefaria_client import SefariaClient
+
+def test_shutdown_stops_rebuilds_before_closing_the_session(monkeypatch):
+    client = SefariaClient()
+    monkeypatch.setattr(app, "REFRESH_SCHEDULER", False)
+    monkeypatch.setattr(app, "sefaria", client)
+    
+    async def main():
+        started = asyncio.Event()
+        
+        async def rebuild():
+            started.set()
+            await asyncio.sleep(60)
+        
+        async with app.lifespan(app.app):
+            session = client.session
+            assert session is not None and not session.closed
+            # As refresh_in_background starts it: the background task only shields the rebuild
+            task = app.regenerations.start("weekly_shutdown", rebuild)
+            app.run_in_background(asyncio.shield(task), "Test rebuild")
+            await started.wait()
+        
+        assert task.cancelled()
+        assert not app.regenerations.in_flight("weekly_shutdown")
+        assert session.closed and client.session is None
+        # Anything still running can't open a new connector after shutdown
+        with pytest.raises(RuntimeError):
+            await client.get_session()
+        
+        await client.open()
+        assert not client.session.closed
+        await client.close()
+    
+    asyncio.run(asyncio.wait_for(main(), timeout=10))
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+
+from parasha_schedule import TISHREI, ParashaSchedule, cycle_readings, fixed_from_hebrew
+from parashot import PARASHOT
+
+# Expected readings below are from the published Hebcal schedules
+schedule = ParashaSchedule()
+
+def readings(location, start, count):
+    return [(day.isoformat(), parashot) for day, parashot in schedule.upcoming(location, start, count)]
+
+def test_rosh_hashanah_dates():
+    assert date.fromordinal(fixed_from_hebrew(5780, TISHREI, 1)) == date(2019, 9, 30)
+    assert date.fromordinal(fixed_from_hebrew(5787, TISHREI, 1)) == date(2026, 9, 12)
+
+@pytest.mark.parametrize("year", [5779, 5781, 5784, 5786, 5787])
+@pytest.mark.parametrize("israel", [False, True])
+def test_every_parasha_read_once_per_cycle(year, israel):
+    read = [parasha for _, parashot in cycle_readings(year, israel) for parasha in parashot]
+    
+    # V'Zot HaBracha is read on Simchat Torah, never on Shabbat
+    assert read == PARASHOT[:-1]
+
+def test_2019_israel_ahead_after_pesach_until_matot_masei():
+    # The eighth day of Pesach was Shabbat 27 April 2019 in the diaspora only
+    assert readings("israel", date(2019, 4, 27), 1) == [("2019-04-27", ["Achrei Mot"])]
+    assert readings("diaspora", date(2019, 4, 27), 1) == [("2019-05-04", ["Achrei Mot"])]
+    assert readings("israel", date(2019, 7, 20), 4) == [
+        ("2019-07-20", ["Pinchas"]),
+        ("2019-07-27", ["Matot"]),
+        ("2019-08-03", ["Masei"]),
+        ("2019-08-10", ["Devarim"]),
+    ]
+    assert readings("diaspora", date(2019, 7, 20), 3) == [
+        ("2019-07-20", ["Balak"]),
+        ("2019-07-27", ["Pinchas"]),
+        ("2019-08-03", ["Matot", "Masei"]),
+    ]
+
+@pytest.mark.parametrize("location", ["diaspora", "israel"])
+def test_2021_nitzavim_and_vayeilech_read_apart(location):
+    assert readings(location, date(2021, 8, 28), 4) == [
+        ("2021-08-28", ["Ki Tavo"]),
+        ("2021-09-04", ["Nitzavim"]),
+        ("2021-09-11", ["Vayeilech"]),
+        ("2021-09-18", ["Ha'Azinu"]),
+    ]
+
+@pytest.mark.parametrize("location", ["diaspora", "israel"])
+def test_2026_nitzavim_vayeilech_combined_before_rosh_hashanah_on_shabbat(location):
+    assert readings(location, date(2026, 8, 29), 4) == [
+        ("2026-08-29", ["Ki Tavo"]),
+        ("2026-09-05", ["Nitzavim", "Vayeilech"]),
+        ("2026-09-19", ["Ha'Azinu"]),
+        ("2026-10-10", ["Bereishit"]),
+    ]
+
+def test_2026_shavuot_on_shabbat_in_the_diaspora():
+    # The second day of Shavuot was Shabbat 23 May 2026 outside Israel
+    assert readings("diaspora", date(2026, 5, 16), 3) == [
+        ("2026-05-16", ["Bamidbar"]),
+        ("2026-05-30", ["Nasso"]),
+        ("2026-06-06", ["Beha'alotcha"]),
+    ]
+    assert readings("israel", date(2026, 5, 16), 3) == [
+        ("2026-05-16", ["Bamidbar"]),
+        ("2026-05-23", ["Nasso"]),
+        ("2026-05-30", ["Beha'alotcha"]),
+    ]
+
+def test_upcoming_extends_past_precomputed_years():
+    far = ParashaSchedule(years_ahead=1).upcoming("diaspora", date(2026, 1, 3), 120)
+    
+    assert len(far) == 120
+    assert all(later > earlier for (earlier, _), (later, _) in zip(far, far[1:]))
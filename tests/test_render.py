@@ -0,0 +1,18 @@
+from render import ContentRenderer
+
+def portion(text):
+    return {'day': 1, 'day_name': "Sunday", 'parasha': "Bereshit", 'book': 'Genesis',
+            'verse_range': "Genesis 1:1", 'verses': [((1, 1), text)]}
+
+def test_fragments_are_reused_only_for_the_same_text():
+    renderer = ContentRenderer()
+    
+    assert "In the beginning" in renderer.daily(portion("In the beginning"))
+    assert "In the beginning" in renderer.daily(portion("In the beginning"))
+    assert (renderer.hits, renderer.misses) == (1, 1)
+    
+    # Another version of the same verse is rendered afresh, not served the cached fragment
+    html = renderer.daily(portion("When God began to create"))
+    assert "When God began to create" in html
+    assert "In the beginning" not in html
+    assert (renderer.hits, renderer.misses) == (1, 2)
@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+
+from cache import TieredCache
+
+def test_incomplete_feed_is_served_but_not_cached(feed_app, sefaria):
+    sefaria.down = {f"P{week}" for week in range(8)}
+    
+    async def main():
+        transport = httpx.ASGITransport(app=feed_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/feeds/weekly/israel")
+    
+    response = asyncio.run(main())
+    
+    assert response.status_code == 200
+    assert response.text.count("<item>") == 0
+    assert feed_app.cache.get_entry("weekly_israel") is None
+    assert feed_app.cache.backend.get_entry("weekly_israel") is None
+
+def test_incomplete_rebuild_keeps_the_cached_feed(feed_app, sefaria):
+    sefaria.down = {"P3"}
+    previous = feed_app.cache.set("weekly_israel", "<rss>complete</rss>")
+    
+    entry = asyncio.run(feed_app.render_feed("weekly", "israel"))
+    
+    assert entry == previous
+    assert feed_app.cache.reload_entry("weekly_israel")['content'] == "<rss>complete</rss>"
+    
+    # Once every portion is back the rebuild replaces it
+    sefaria.down.clear()
+    entry = asyncio.run(feed_app.render_feed("weekly", "israel"))
+    assert entry['content'].count("<item>") == 8
+    assert feed_app.cache.reload_entry("weekly_israel")['content'] == entry['content']
+
+def test_daily_feed_with_a_failed_day_is_not_cached(feed_app, sefaria):
+    sefaria.malformed = {"P1"}
+    
+    entry = asyncio.run(feed_app.render_feed("daily", "israel"))
+    
+    assert "P1-day-" not in entry['content']
+    assert "P2-day-1" in entry['content']
+    assert feed_app.cache.backend.get_entry("daily_israel") is None
+
+def test_rebuild_with_the_same_items_keeps_the_validators(monkeypatch, feed_app):
+    first = asyncio.run(feed_app.render_feed("weekly", "israel"))
+    # Another worker, with its own memory tier and item cache, rebuilds a little later
+    monkeypatch.setattr(feed_app, "cache", TieredCache(feed_app.cache.backend))
+    feed_app.rss_gen.clear_caches()
+    
+    second = asyncio.run(feed_app.render_feed("weekly", "israel"))
+    
+    assert second['etag'] == first['etag']
+    assert second['modified'] == first['modified']
+    assert second['content'] == first['content']
+    assert second['timestamp'] >= first['timestamp']
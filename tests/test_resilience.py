@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, Upstream, UpstreamError
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+def failing(*errors, result="ok"):
+    """An upstream call that raises each of errors in turn, then returns result"""
+    calls = []
+    
+    async def func():
+        calls.append(len(calls))
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    
+    return func, calls
+
+def test_transient_errors_are_retried():
+    upstream = Upstream("test", attempts=3, base_delay=0)
+    func, calls = failing(UpstreamError("busy", 503), asyncio.TimeoutError())
+    
+    assert asyncio.run(upstream.call("key", func)) == "ok"
+    assert len(calls) == 3
+    assert not upstream.breaker.is_open
+
+def test_permanent_errors_are_not_retried():
+    upstream = Upstream("test", attempts=3, base_delay=0)
+    func, calls = failing(UpstreamError("no such ref", 404))
+    
+    with pytest.raises(UpstreamError):
+        asyncio.run(upstream.call("key", func))
+    assert len(calls) == 1
+    # A bad request says nothing about the upstream's health
+    assert upstream.breaker.failures == 0
+
+def test_breaker_opens_then_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+    
+    # Half-open: one trial after the timeout, the rest still fail fast
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    
+    # A failed trial reopens at once, without waiting for the threshold
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+    
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+    assert breaker.allow()
+
+def test_stalled_trial_does_not_block_forever(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    
+    # The trial never reports back
+    clock.now += 30
+    assert breaker.allow()
+
+def test_last_good_response_is_served_while_open(clock):
+    upstream = Upstream("test", attempts=1, base_delay=0, breaker=CircuitBreaker(failure_threshold=1))
+    func, _ = failing(result="good")
+    assert asyncio.run(upstream.call("key", func)) == "good"
+    
+    func, _ = failing(UpstreamError("down", 502))
+    assert asyncio.run(upstream.call("key", func)) == "good"
+    assert upstream.breaker.is_open
+    
+    # The open circuit isn't called at all
+    func, calls = failing(result="new")
+    assert asyncio.run(upstream.call("key", func)) == "good"
+    assert calls == []
+    # Nothing to fall back on for another key
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(upstream.call("other", func))
+    
+    clock.now += upstream.breaker.reset_timeout
+    assert asyncio.run(upstream.call("key", func)) == "new"
+    assert not upstream.breaker.is_open
@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+
+from metrics import CACHE_REQUESTS
+
+def test_concurrent_cold_streams_share_one_rebuild(monkeypatch, feed_app, sefaria):
+    monkeypatch.setattr(feed_app, "STREAM_FEEDS", True)
+    sefaria.delay = 0.05
+    
+    def count(result):
+        return CACHE_REQUESTS.value(result=result, kind="weekly", location="israel")
+    misses, coalesced = count("miss"), count("coalesced")
+    
+    async def main():
+        transport = httpx.ASGITransport(app=feed_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            requests = [client.get("/feeds/weekly/israel") for _ in range(3)]
+            return await asyncio.wait_for(asyncio.gather(*requests), timeout=10)
+    
+    responses = asyncio.run(main())
+    
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert len({response.text for response in responses}) == 1
+    assert responses[0].text.count("<item>") == 8
+    assert sefaria.fetches == 8
+    assert count("miss") - misses == 1
+    assert count("coalesced") - coalesced == 2
+
+def test_stream_that_fails_before_its_first_chunk_is_not_a_200(monkeypatch, feed_app):
+    monkeypatch.setattr(feed_app, "STREAM_FEEDS", True)
+    # Anything cached is too old to serve, even stale
+    monkeypatch.setitem(feed_app.FEED_MAX_AGE_HOURS, "weekly", 0)
+    monkeypatch.setattr(feed_app, "STALE_MAX_AGE_HOURS", 0)
+    
+    async def calendar_down(location, count=8):
+        raise RuntimeError("Hebcal unavailable")
+    monkeypatch.setattr(feed_app.calendar, "get_upcoming_parashot_async", calendar_down)
+    
+    async def get():
+        transport = httpx.ASGITransport(app=feed_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.wait_for(client.get("/feeds/weekly/israel"), timeout=10)
+    
+    response = asyncio.run(get())
+    assert response.status_code == 503
+    
+    # A cached copy too old to serve stale is still better than nothing
+    feed_app.cache.set("weekly_israel", "<rss>old</rss>")
+    response = asyncio.run(get())
+    assert response.status_code == 200
+    assert response.text == "<rss>old</rss>"
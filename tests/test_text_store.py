@@ -0,0 +1,59 @@
+from cache import TextStore
+from rss_generator import RSSGenerator
+from sefaria_client import SefariaClient
+
+VERSION, LANGUAGE = "v", "en"
+
+def test_memory_is_bounded(tmp_path):
+    store = TextStore(str(tmp_path), max_memory=2)
+    for ref in ("A.1", "B.1", "C.1"):
+        store.set(ref, VERSION, LANGUAGE, {'text': [ref]})
+    
+    assert len(store._memory) == 2
+    # The evicted entry is still on disk
+    assert store.get("A.1", VERSION, LANGUAGE) == {'text': ["A.1"]}
+
+def test_invalidate_reaches_other_processes(tmp_path):
+    store, other = TextStore(str(tmp_path)), TextStore(str(tmp_path))
+    store.set("A.1", VERSION, LANGUAGE, {'text': ["old"]})
+    assert other.get("A.1", VERSION, LANGUAGE) == {'text': ["old"]}
+    
+    assert store.invalidate("A.1") == 1
+    
+    assert other.get("A.1", VERSION, LANGUAGE) is None
+
+def test_invalidated_texts_are_rendered_again(tmp_path):
+    client = SefariaClient(text_store=TextStore(str(tmp_path)))
+    generator = RSSGenerator()
+    generator._check_texts(client)
+    generator.items.set(("weekly", "israel", "P", None, None), "<item/>")
+    generator.renderer._fragments[("Genesis", 1, 1)] = ("old", "<p>old</p>")
+    
+    # Invalidated by another process sharing the store
+    TextStore(str(tmp_path)).invalidate()
+    generator._check_texts(client)
+    
+    assert generator.items.stats()['entries'] == 0
+    assert not generator.renderer._fragments
+
+def test_invalidate_drops_overlapping_refs(tmp_path):
+    store = TextStore(str(tmp_path))
+    for ref in ("Genesis.6.9-11.32", "Genesis.6.9-6.22", "Genesis.11.1-11.32", "Genesis.12.1-17.27", "Exodus.6.9-7.1"):
+        store.set(ref, VERSION, LANGUAGE, {'text': [ref]})
+    
+    assert store.invalidate("Genesis.6.9-11.32") == 3
+    
+    assert store.get("Genesis.6.9-6.22", VERSION, LANGUAGE) is None
+    assert store.get("Genesis.11.1-11.32", VERSION, LANGUAGE) is None
+    assert store.get("Genesis.12.1-17.27", VERSION, LANGUAGE) is not None
+    assert store.get("Exodus.6.9-7.1", VERSION, LANGUAGE) is not None
+
+def test_client_invalidates_overlapping_prefetched_refs():
+    client = SefariaClient()
+    client._keep("Genesis.6.9-6.22", {'text': ["day"]})
+    client._keep("Genesis.12.1-12.20", {'text': ["other"]})
+    
+    client.invalidate_texts("Genesis.6.9-11.32")
+    
+    assert not client._has_text("Genesis.6.9-6.22")
+    assert client._has_text("Genesis.12.1-12.20")
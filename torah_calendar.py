@@ -1,14 +1,84 @@
-from datetime import datetime, timedelta
-import requests
-from typing import Dict, Any, List
+from datetime import datetime
+import asyncio
+import aiohttp
+from typing import Dict, Any, List, Callable, Awaitable, Optional
+
+from parasha_schedule import ParashaSchedule
+from parashot import TORAH_PORTION_MAP, combined_name
+from resilience import Upstream
 
 class TorahCalendar:
-    def __init__(self):
+    def __init__(self, session_getter: Optional[Callable[[], Awaitable[aiohttp.ClientSession]]] = None,
+                 upstream: Optional[Upstream] = None):
         self.hebcal_base = "https://www.hebcal.com/hebcal"
+        # Share a pooled session (e.g. SefariaClient.get_session) when given one
+        self.session_getter = session_getter
+        self.session = None
+        self.timeout = aiohttp.ClientTimeout(total=10)
+        self.schedule = ParashaSchedule()
+        self.upstream = upstream or Upstream("Hebcal")
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session_getter:
+            return await self.session_getter()
+        if not self.session or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=self.timeout)
+        return self.session
+    
+    async def _get_json(self, session: aiohttp.ClientSession, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        # aiohttp only accepts str/int/float query values
+        params = {k: str(v) for k, v in params.items()}
+        
+        async def fetch():
+            async with session.get(url, params=params, timeout=self.timeout) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+        
+        key = url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        return await self.upstream.call(key, fetch)
     
     def get_current_parasha(self, location: str = "diaspora") -> Dict[str, Any]:
+        """Synchronous wrapper around get_current_parasha_async for scripts"""
+        return asyncio.run(self._run_standalone(self.get_current_parasha_async, location))
+    
+    def get_upcoming_parashot(self, location: str = "diaspora", count: int = 10) -> List[Dict[str, Any]]:
+        """Get the next count Shabbat readings, starting with today if it's Shabbat.
+        
+        Resolved from the locally computed schedule, so combined parashot and
+        holiday Shabbatot are handled and no network call is needed.
+        """
+        try:
+            today = datetime.now().date()
+            
+            parashot = []
+            for shabbat, names in self.schedule.upcoming(location, today, count):
+                parasha_name = combined_name(names)
+                parashot.append({
+                    'name': parasha_name,
+                    'name_english': parasha_name,
+                    'date': shabbat,
+                    'torah_reading': {'torah': TORAH_PORTION_MAP.get(parasha_name, parasha_name)},
+                    'url': f"https://www.hebcal.com/sedrot/{parasha_name.lower()}"
+                })
+            
+            return parashot
+            
+        except Exception as e:
+            print(f"Error generating upcoming parashot: {e}")
+            return []
+    
+    async def _run_standalone(self, method, *args):
+        # asyncio.run creates a fresh loop, so use a session bound to it
+        async with aiohttp.ClientSession() as session:
+            return await method(*args, session=session)
+    
+    async def get_current_parasha_async(self, location: str = "diaspora",
+                                        session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
         """Get current Torah portion from Hebcal API"""
         try:
+            if session is None:
+                session = await self._get_session()
+            
             # Use the converter API to get today's Hebrew date and events
             today = datetime.now()
             converter_url = "https://www.hebcal.com/converter/"
@@ -20,9 +90,7 @@ class TorahCalendar:
                 'g2h': 1
             }
             
-            response = requests.get(converter_url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(session, converter_url, params)
             
             # Look for Torah portion in events
             events = data.get('events', [])
@@ -53,9 +121,7 @@ class TorahCalendar:
                 'i': 'off' if location == "diaspora" else 'on'
             }
             
-            response = requests.get(self.hebcal_base, params=params_weekly, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(session, self.hebcal_base, params_weekly)
             
             # Find current/next Torah reading
             today_date = today.date()
@@ -78,74 +144,11 @@ class TorahCalendar:
             print(f"Error fetching parasha: {e}")
             return None
     
-    def get_upcoming_parashot(self, location: str = "diaspora", count: int = 10) -> List[Dict[str, Any]]:
-        """Get multiple upcoming Torah portions using Torah cycle logic"""
-        try:
-            # Standard Torah cycle (54 portions in a regular year)
-            torah_cycle = [
-                "Bereishit", "Noach", "Lech-Lecha", "Vayera", "Chayei Sara", "Toldot",
-                "Vayetzei", "Vayishlach", "Vayeshev", "Miketz", "Vayigash", "Vayechi",
-                "Shemot", "Vaera", "Bo", "Beshalach", "Yitro", "Mishpatim", "Terumah",
-                "Tetzaveh", "Ki Tisa", "Vayakhel", "Pekudei", "Vayikra", "Tzav", "Shmini",
-                "Tazria", "Metzora", "Achrei Mot", "Kedoshim", "Emor", "Behar", "Bechukotai",
-                "Bamidbar", "Nasso", "Beha'alotcha", "Sh'lach", "Korach", "Chukat", "Balak",
-                "Pinchas", "Matot", "Masei", "Devarim", "Vaetchanan", "Eikev", "Re'eh",
-                "Shoftim", "Ki Teitzei", "Ki Tavo", "Nitzavim", "Vayeilech", "Ha'Azinu",
-                "V'Zot HaBerachah"
-            ]
-            
-            # Get current parasha to find our position in the cycle
-            current_parasha = self.get_current_parasha(location)
-            today = datetime.now().date()
-            
-            if not current_parasha:
-                print("Could not get current parasha, using Re'eh as current (August 2025)")
-                current_index = torah_cycle.index("Re'eh")  # Hard-code for now since we know it's Re'eh
-            else:
-                current_name = current_parasha['name_english']
-                # Normalize apostrophes to handle Unicode differences
-                current_name_normalized = current_name.replace(''', "'").replace(''', "'")
-                try:
-                    current_index = torah_cycle.index(current_name_normalized)
-                except ValueError:
-                    print(f"Current parasha '{current_name}' not found in cycle, using Re'eh as fallback")
-                    current_index = torah_cycle.index("Re'eh")  # Use Re'eh as fallback for August 2025
-            
-            # Calculate the next Saturday (start of upcoming Torah portions)
-            days_until_saturday = (5 - today.weekday()) % 7
-            if days_until_saturday == 0:
-                # Today is Saturday - start with current parasha
-                next_saturday = today
-                start_offset = 0  # Start with current parasha
-            else:
-                # Check if we should include this week's Saturday or next week's
-                this_saturday = today + timedelta(days=days_until_saturday)
-                # If this Saturday hasn't passed yet, include it
-                next_saturday = this_saturday
-                start_offset = 0  # Start with current parasha (this week's)
-            
-            parashot = []
-            
-            # Generate upcoming parashot starting from this or next Saturday
-            for i in range(count):
-                # Calculate parasha index (wrap around for next year)
-                parasha_index = (current_index + i + start_offset) % len(torah_cycle)
-                parasha_name = torah_cycle[parasha_index]
-                
-                # Calculate the date (each parasha is one week apart from next Saturday)
-                parasha_date = next_saturday + timedelta(weeks=i)
-                
-                parasha_data = {
-                    'name': parasha_name,
-                    'name_english': parasha_name,
-                    'date': parasha_date,
-                    'torah_reading': {'torah': parasha_name},
-                    'url': f"https://www.hebcal.com/sedrot/{parasha_name.lower()}"
-                }
-                parashot.append(parasha_data)
-            
-            return parashot
-            
-        except Exception as e:
-            print(f"Error generating upcoming parashot: {e}")
-            return []
\ No newline at end of file
+    async def get_upcoming_parashot_async(self, location: str = "diaspora", count: int = 10) -> List[Dict[str, Any]]:
+        """Get multiple upcoming Torah portions from the precomputed schedule"""
+        return self.get_upcoming_parashot(location, count)
+    
+    async def close(self):
+        if self.session:
+            await self.session.close()
+        self.session = None